@@ -5,13 +5,50 @@ This module sets up custom CSS styles for the sidebar, displays the logo,
 and routes to different pages ("Home", "Analyze CV", and "Technical Review")
 based on user selection.
 
-Pages imported:
-    - recruitment_process_page
-    - analyze_cv_page
+Pages are imported on demand, only when they are selected for the first time, so the
+heavy dependencies of the analysis pages (LangGraph, pandas, python-docx) do not delay
+the start of the application and the first paint of the Home page:
     - main_page
+    - analyze_cv_page
+    - recruitment_process_page
+
+The time each page import took is recorded in the diagnostics panel and metrics file.
+Background work of the previously selected page is cancelled when the page changes.
 """
+import importlib
+import sys
+import time
+
 import streamlit as st
-from pages import recruitment_process_page, analyze_cv_page, main_page
+from services.async_runner import cancel_runs
+from services.metrics import bind_session, get_metrics, show_diagnostics
+
+PAGES = {
+    "Home": "pages.main_page",
+    "Analyze CV": "pages.analyze_cv_page",
+    "Technical Review": "pages.recruitment_process_page",
+}
+
+
+def load_page(name):
+    """
+    Import the module of a page on first use and record how long the import took.
+
+    :param name: Name of the page shown in the menu.
+    :type name: str
+    :return: Page module with a ``show`` function.
+    :rtype: module
+    """
+    module_name = PAGES[name]
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    get_metrics().record("import", module_name, time.perf_counter() - start)
+    return module
+
+
+bind_session()
 # --- Custom Styling ---
 hide_menu_style = """
     <style>
@@ -40,12 +77,11 @@ st.sidebar.image(logo_path, use_container_width=True)
 st.sidebar.title("Menu")
 page = st.sidebar.selectbox(
     "Select a page",
-    ("Home","Analyze CV", "Technical Review")
+    tuple(PAGES)
 )
 # --- Page Routing ---
-if page == "Home":
-    main_page.show()
-elif page == "Analyze CV":
-    analyze_cv_page.show()
-elif page == "Technical Review":
-    recruitment_process_page.show()
\ No newline at end of file
+# Workflows still running for another page are abandoned
+cancel_runs((page,))
+load_page(page).show()
+
+show_diagnostics()
@@ -1,18 +1,33 @@
+import time
+
 import streamlit as st
-from docx import Document
-import os
-from dotenv import load_dotenv
-from typing_extensions import TypedDict
-from langchain_openai import ChatOpenAI
-from langgraph.graph import StateGraph, START,END
 import pandas as pd
-
+from langchain_core.utils.json import parse_partial_json
+from services.async_runner import iterate
+from services.cv_workflow import SCORE_CATEGORIES, build_graph, rank_candidates, stream_candidates
+from services.docx_text import content_hash, extract_docx_text
+from services.llm_client import STREAMING, get_llm
+from services.matching import CV, MATCH_WEIGHTS, REQUIREMENTS, get_profile_store
+from services.metrics_callback import get_metrics_callback
+from services.skills import coverage_percent, skill_coverage
+
+# Graph nodes whose text results are shown as chat messages, with their state keys
+RENDERED_NODES = {
+    "analise_cv_node": "cv_analysis",
+    "analise_requirements_node": "requirements_analysis",
+    "model_cv_node": "model_cv",
+}
+# Nodes answering with a structured Assessment, streamed as JSON text
+STRUCTURED_NODES = {"analise_cv_node", "analise_requirements_node"}
 
 
 def importDox(label, key):
     """
     Upload and read the contents of a .docx file.
 
+    The extracted text is cached by the hash of the uploaded bytes, so reruns do not parse
+    the same file again.
+
     :param label: Label for the Streamlit file uploader.
     :type label: str
     :param key: Unique key for the uploader widget.
@@ -27,194 +42,276 @@ def importDox(label, key):
         st.write(f"File: {uploaded_file.name}")
 
         try:
-            document = Document(uploaded_file)
-            document_text = "\n".join([paragraph.text for paragraph in document.paragraphs])
+            data = uploaded_file.getvalue()
+            document_text = extract_docx_text(content_hash(data), data)
         except Exception as e:
             st.error(f"Cannot read the file: {e}")
 
     return document_text
-def app(cv_text,requirements_text):
+
+
+def show_skills_chart(cv_scores, requirements_scores):
+    """
+    Display the comparison of the CV and requirements scores as a bar chart.
+
+    :param cv_scores: Candidate scores ordered as :data:`SCORE_CATEGORIES`.
+    :type cv_scores: list[int]
+    :param requirements_scores: Required scores ordered as :data:`SCORE_CATEGORIES`.
+    :type requirements_scores: list[int]
+    """
+    dane = {
+        'Kategoria': SCORE_CATEGORIES,
+        'You': cv_scores,
+        'Requirements': requirements_scores
+    }
+    df = pd.DataFrame(dane)
+
+    df = df.set_index('Kategoria')
+
+    st.bar_chart(df, horizontal=True)
+
+
+def streamed_text(node, text):
+    """
+    Return the part of a streamed response that can be shown to the user.
+
+    Structured analyses arrive as incomplete JSON, so only the summary parsed so far is
+    shown for them.
+
+    :param node: Name of the graph node producing the response.
+    :type node: str
+    :param text: Response text streamed so far.
+    :type text: str
+    :return: Displayable text.
+    :rtype: str
+    """
+    if node not in STRUCTURED_NODES:
+        return text
+    try:
+        parsed = parse_partial_json(text)
+    except ValueError:
+        return ""
+    if isinstance(parsed, dict):
+        return parsed.get("summary") or ""
+    return ""
+
+
+def show_changed_sections(sections):
+    """
+    Display which CV sections changed since the previously analyzed CV of the session.
+
+    :param sections: Hashes of the CV sections by section name.
+    :type sections: dict[str, str]
+    """
+    previous = st.session_state.get("cv_sections")
+    st.session_state.cv_sections = sections
+    if not previous:
+        return
+    changed = [section for section, digest in sections.items() if previous.get(section) != digest]
+    if changed:
+        st.caption(f"Re-analyzed changed sections: {', '.join(changed)}; the others were reused.")
+    else:
+        st.caption("No section changed; the previous analysis was reused.")
+
+
+def show_skill_coverage(cv_text, requirements_text):
+    """
+    Display the skills of the taxonomy found in the CV and in the job requirements.
+
+    The skills are matched locally, so they are shown before the model analysis starts
+    and remain when the model is slow or unavailable.
+
+    :param cv_text: Text content of the CV.
+    :type cv_text: str
+    :param requirements_text: Text content of the job requirements.
+    :type requirements_text: str
+    """
+    coverage = skill_coverage(cv_text, requirements_text)
+    if coverage.empty:
+        return
+    required = coverage.index[coverage["Required"]]
+    found = coverage.index[coverage["Required"] & coverage["In CV"]]
+    with st.chat_message("assistant"):
+        if len(required):
+            percent = coverage_percent(coverage.index[coverage["In CV"]], required)
+            st.markdown(f"**Skill coverage:** the CV mentions {len(found)} of the {len(required)} skills "
+                        f"named in the requirements ({percent}%).")
+        else:
+            st.markdown("**Skill coverage:** the requirements name no skills of the taxonomy.")
+        st.dataframe(coverage)
+
+
+def app(cv_text,requirements_text, cv_name=None, requirements_name=None):
     """
     Analyze a CV and job requirements using a multi-step graph-based workflow.
 
+    The workflow from :mod:`services.cv_workflow` does not render anything itself; it runs
+    on the background event loop and its streamed tokens and node results are displayed
+    here as they arrive. Leaving the page stops the workflow and its model calls.
+
+    The CV is analyzed section by section; after a revised CV is uploaded, only its
+    changed sections are sent to the model again. The skill coverage matched locally is
+    shown first and is left as the result when the model analysis fails.
+
     :param cv_text: Text content of the uploaded CV.
     :type cv_text: str
     :param requirements_text: Text content of the uploaded job requirements.
     :type requirements_text: str
+    :param cv_name: Name of the CV in the stored profiles, e.g. its file name.
+    :type cv_name: str or None
+    :param requirements_name: Name of the requirements in the stored profiles.
+    :type requirements_name: str or None
+    """
+    graph = build_graph()
+    state = {"cv_text": cv_text, "requirements_text": requirements_text}
+    if cv_name:
+        state["cv_name"] = cv_name
+    if requirements_name:
+        state["requirements_name"] = requirements_name
+
+    placeholders = {}
+    streamed = {}
+    values = dict(state)
+
+    def placeholder(node):
+        if node not in placeholders:
+            with st.chat_message("assistant"):
+                placeholders[node] = st.empty()
+            streamed[node] = {}
+        return placeholders[node]
+
+    show_skill_coverage(cv_text, requirements_text)
+    # The two analyses run in parallel, so their messages are created up front in a fixed order
+    placeholder("analise_cv_node")
+    placeholder("analise_requirements_node")
+
+    chunks = graph.astream(
+        state, config={"callbacks": [get_metrics_callback()]}, stream_mode=["messages", "updates"]
+    )
+    try:
+        with iterate(chunks, scope=("Analyze CV",)) as chunks:
+            for mode, chunk in chunks:
+                if mode == "messages":
+                    message, metadata = chunk
+                    node = metadata.get("langgraph_node")
+                    if STREAMING and node in RENDERED_NODES:
+                        placeholder(node)
+                        # A node may stream several responses at once, e.g. one per CV section
+                        parts = streamed[node]
+                        parts[message.id] = parts.get(message.id, "") + message.content
+                        texts = (streamed_text(node, text) for text in parts.values())
+                        placeholders[node].markdown("\n\n".join(text for text in texts if text))
+                else:
+                    for node, update in chunk.items():
+                        values.update(update or {})
+                        if node in RENDERED_NODES:
+                            placeholder(node).markdown(update[RENDERED_NODES[node]])
+                        if node == "analise_cv_node":
+                            show_changed_sections(update["cv_sections"])
+                        elif node == "skills_node":
+                            show_skills_chart(values["cv_scores"], values["requirements_scores"])
+    except Exception as e:
+        st.warning(f"The model analysis failed, only the locally matched skill coverage is available: {e}")
+
+
+def batch_app(cvs, requirements_text, concurrency):
+    """
+    Screen many CVs against one job requirements document and show the ranking.
+
+    The screening runs on the background event loop, like :func:`app`, so leaving the
+    page cancels the candidates still being analyzed.
+
+    :param cvs: Pairs of CV name and CV text.
+    :type cvs: list[tuple[str, str]]
+    :param requirements_text: Text content of the job requirements.
+    :type requirements_text: str
+    :param concurrency: Maximum number of candidates analyzed at once.
+    :type concurrency: int
+    """
+    llm = get_llm()
+    progress = st.progress(0.0, text=f"Analyzed 0 of {len(cvs)} CVs")
+    table = st.empty()
+    results = []
+
+    start = time.perf_counter()
+    rows = stream_candidates(llm, cvs, requirements_text, concurrency)
+    with iterate(rows, scope=("Analyze CV",)) as rows:
+        for row in rows:
+            results.append(row)
+            progress.progress(len(results) / len(cvs), text=f"Analyzed {len(results)} of {len(cvs)} CVs")
+            table.dataframe(rank_candidates(results))
+    elapsed = time.perf_counter() - start
+    st.caption(
+        f"{len(results)} candidates in {elapsed:.1f} s "
+        f"({60 * len(results) / elapsed:.1f} candidates per minute)"
+    )
+
+
+def show_batch():
     """
+    Display the batch screening UI: many CVs are ranked against one job requirements file.
+    """
+    with st.container():
+        col1, col2 = st.columns(2)
 
-    load_dotenv()
-
-    class State(TypedDict):
-        graph_state: object
-
-
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    if not OPENAI_API_KEY:
-        raise ValueError("OPENAI_API_KEY is not set in the .env file")
-
-    llm = ChatOpenAI(model="gpt-4o")
-
-
-
-
-    def analise_cv_node(state):
-        """
-        Analyze the CV text and extract technical, soft, and language skills.
-
-        :param state: Current graph state containing user and assistant messages.
-        :type state: dict
-        :return: Updated graph state.
-        :rtype: dict
-        """
-        cv_text = state["graph_state"][-2]["content"]
-        prompt = (
-            f"Analyze this CV in terms of technical skills, soft skills, languages, and professional experience:\n"
-            f"{cv_text}\n\n"
-            f"Additionally, provide an assessment of the user's skills based on:\n"
-            f"- Experience\n"
-            f"- Technical abilities\n"
-            f"- Language proficiency\n\n"
-            f"Return the results in the following format:\n"
-            f"[Detailed Summary: text with a comprehensive summary of skills,\n"
-            f"Skill Assessment: Experience: number on a scale of 1-10, "
-            f"Technical Skills: number on a scale of 1-10, "
-            f"Languages: number on a scale of 1-10]"
-        )
-        llm_response = llm.invoke(prompt)
-        with st.chat_message("assistant"):
-            st.markdown(llm_response.content)
-
-        state["graph_state"].append({"role": "assistant", "content": llm_response.content})
-        return state
-
-    def analise_requirements_node(state):
-        """
-        Analyze the job requirements text and extract key skill and experience expectations.
-
-        :param state: Current graph state.
-        :type state: dict
-        :return: Updated graph state.
-        :rtype: dict
-        """
-        requirements_text = state["graph_state"][-2]["content"]
-        prompt = (
-            f"Analyze the job requirements in terms of technical skills, soft skills, languages, "
-            f"and professional experience:\n{requirements_text}\n\n"
-            f"Additionally, provide an evaluation of the requirements based on:\n"
-            f"- Experience\n"
-            f"- Technical skills\n"
-            f"- Language proficiency\n\n"
-            f"Return the results in the following format:\n"
-            f"[Detailed Summary: text with a comprehensive summary of the requirements,\n"
-            f"Requirements Assessment: Experience: number on a scale of 1-10, "
-            f"Technical Skills: number on a scale of 1-10, "
-            f"Languages: number on a scale of 1-10]"
-        )
-
-        llm_response = llm.invoke(prompt)
-        with st.chat_message("assistant"):
-            st.markdown(llm_response.content)
-
-        state["graph_state"].append({"role": "assistant", "content": llm_response.content})
-        return state
-
-    def skills_node(state):
-        """
-        Compare the skills in the CV against the job requirements and visualize the results.
-
-        :param state: Current graph state.
-        :type state: dict
-        :return: Updated graph state.
-        :rtype: dict
-        """
-        requirements_text = state["graph_state"][-1]["content"]
-        cv_text = state["graph_state"][-2]["content"]
-
-        prompt = (
-            f"In these messages: {requirements_text} and {cv_text}, you have sections for "
-            f"experience, technical skills, and languages. As a result, return a string in the "
-            f"following format:\n"
-            f"Line for requirements_text: number for experience, number for technical skills, "
-            f"number for languages\n"
-            f"Line for cv_text: number for experience, number for technical skills, number for languages\n\n"
-            f"Example of a correct response:\n"
-            f"1,2,5\n"
-            f"4,6,3\n\n"
-            f"Invoke a tool to convert the string and always return only the numbers, nothing else, "
-            f"no additional text."
-        )
-        llm_response = llm.invoke(prompt)
-
-        print(llm_response.content)
-
-        lines = llm_response.content.strip().split("\n")
-        lista1 = list(map(int, lines[0].split(",")))  # Druga linia jako lista liczb
-        lista2 = list(map(int, lines[1].split(",")))  # Trzecia linia jako lista liczb
-        dane = {
-            'Kategoria': ['Experience', 'Technical Skills', 'Languages'],
-            'You': lista1,
-            'Requirements': lista2
-        }
-        df = pd.DataFrame(dane)
-
-        df = df.set_index('Kategoria')
-
-        st.bar_chart(df, horizontal=True)
-
-        state["graph_state"].append({"role": "assistant", "content": str(llm_response.content)})
-        return state
-
-    def model_cv_node(state):
-        """
-        Generate a model CV tailored to job requirements and user-provided CV content.
-
-        :param state: Current graph state.
-        :type state: dict
-        :return: Updated graph state.
-        :rtype: dict
-        """
-        user_message = state["graph_state"][-2]["content"]
-        cv = state["graph_state"][0]["content"]
-        prompt = (
-            f"Based on the provided information {user_message} and my CV {cv}, "
-            f"create a professional model CV tailored to the given details. Ensure the CV follows "
-            f"an industry-standard format with the following sections:\n"
-            f"- Contact Information\n"
-            f"- Professional Summary\n"
-            f"- Skills (highlight technical and soft skills)\n"
-            f"- Work Experience (list positions chronologically with relevant responsibilities)\n"
-            f"- Education\n"
-            f"- Additional Information (e.g., certifications, languages, or achievements)\n\n"
-            f"The CV should be written in a clear, concise, and professional style."
-        )
-
-        llm_response = llm.invoke(prompt)
-        with st.chat_message("assistant"):
-            st.markdown(llm_response.content)
-
-        return state
-
-    # Build the workflow graph
-    builder = StateGraph(State)
-    builder.add_node("analise_cv_node", analise_cv_node)
-    builder.add_node("analise_requirements_node", analise_requirements_node)
-    builder.add_node("skills_node", skills_node)
-    builder.add_node("model_cv_node", model_cv_node)
-
-
-    builder.add_edge(START, "analise_cv_node")
-    builder.add_edge("analise_cv_node", "analise_requirements_node")
-    builder.add_edge("analise_requirements_node", "skills_node")
-    builder.add_edge("skills_node", "model_cv_node")
-    builder.add_edge("model_cv_node", END)
-
-    graph = builder.compile()
-    state = {"graph_state": [{"role": "system", "content": cv_text}]}
-    state["graph_state"].append({"role": "system", "content": requirements_text})
-    graph.invoke(state)
+        with col1:
+            cv_files = st.file_uploader(
+                "Upload candidate CVs .docx", type=["docx"], accept_multiple_files=True, key="batch_cv_upload"
+            )
+
+        with col2:
+            requirements_text = importDox("Upload requirements for the job .docx", key="batch_requirements_upload")
+
+        concurrency = st.slider("Candidates analyzed in parallel", 1, 32, 8)
+
+        if st.button("Screen candidates"):
+            cvs = []
+            for cv_file in cv_files or []:
+                try:
+                    data = cv_file.getvalue()
+                    cvs.append((cv_file.name, extract_docx_text(content_hash(data), data)))
+                except Exception as e:
+                    st.warning(f"Cannot read the file {cv_file.name}: {e}")
+            if not cvs or not requirements_text:
+                st.error("Please upload cv and requirements files.")
+            else:
+                batch_app(cvs, requirements_text, concurrency)
 
 
+def show_profiles():
+    """
+    Rank the stored candidates against stored requirements, or the stored requirements
+    against a stored candidate, with adjustable category weights.
+
+    Profiles are stored by every analysis and screening, so ranking needs no model call.
+    """
+    store = get_profile_store()
+    direction = st.radio("Rank", ["Candidates for requirements", "Requirements for a candidate"], horizontal=True)
+    source, ranked = (REQUIREMENTS, CV) if direction == "Candidates for requirements" else (CV, REQUIREMENTS)
+    names, matrix = store.profiles(source)
+    if not names:
+        st.info("No profiles stored yet. Analyze or screen CVs first.")
+        return
+    index = st.selectbox("Profile", range(len(names)), format_func=lambda i: names[i])
+    columns = st.columns(len(SCORE_CATEGORIES))
+    weights = [
+        column.slider(f"{category} weight", 0.0, 3.0, weight, 0.1)
+        for column, category, weight in zip(columns, SCORE_CATEGORIES, MATCH_WEIGHTS)
+    ]
+    if not any(weights):
+        st.error("At least one weight must be above 0.")
+        return
+
+    start = time.perf_counter()
+    ranking = store.rank(matrix[index], against=ranked, weights=weights)
+    elapsed = time.perf_counter() - start
+    df = pd.DataFrame(
+        [{"Name": name, "Match %": match, **dict(zip(SCORE_CATEGORIES, scores))} for name, match, scores in ranking]
+    )
+    df.index = range(1, len(df) + 1)
+    df.index.name = "Rank"
+    st.dataframe(df)
+    st.caption(f"Ranked {len(ranking)} profiles in {1000 * elapsed:.1f} ms")
 
 
 def show():
@@ -223,8 +320,19 @@ def show():
 
     This function creates a two-column layout where the user can upload the CV and the job
     requirements. When the "Analyze" button is pressed, the uploaded files are processed.
+    In batch screening mode, many CVs are ranked against one requirements file instead,
+    and the stored profiles of earlier analyses can be ranked without new model calls.
     """
     st.title("Analyze CV")
+    mode = st.radio(
+        "Mode", ["Single CV", "Batch screening", "Stored profiles"], horizontal=True, label_visibility="collapsed"
+    )
+    if mode == "Batch screening":
+        show_batch()
+        return
+    if mode == "Stored profiles":
+        show_profiles()
+        return
     with st.container():
         col1, col2 = st.columns(2)
 
@@ -240,4 +348,8 @@ def show():
             else:
                 with st.spinner("Processing..."):
 
-                    app(cv_text,requirements_text)
+                    app(
+                        cv_text, requirements_text,
+                        cv_name=getattr(st.session_state.get("cv_upload"), "name", None),
+                        requirements_name=getattr(st.session_state.get("job_requirements_upload"), "name", None),
+                    )
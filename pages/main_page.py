@@ -1,6 +1,5 @@
 import streamlit as st
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 import time
 
 
@@ -12,8 +11,8 @@ def show():
 
     1. Loads environment variables using :func:`load_dotenv`.
     2. Sets the page title to "Hello" using :func:`st.title`.
-    3. Initializes the language model via :class:`ChatOpenAI` with the ``gpt-4o`` model.
-    4. Creates and updates a progress bar that simulates a long-running operation.
+    3. Creates a progress bar that simulates a long-running operation.
+    4. Gets the shared ``gpt-4o`` language model client via :func:`get_llm` and updates the progress bar.
     5. At 50% progress, sends a recruitment-related prompt to the language model.
     6. At 99% progress, displays the LLM's response as a chat message using :func:`st.chat_message`.
     7. Finally, clears the progress bar.
@@ -25,11 +24,13 @@ def show():
     """
     load_dotenv()
     st.title("Hello")
-    llm = ChatOpenAI(model="gpt-4o")
-
     progress_text = "Operation in progress. Please wait."
     my_bar = st.progress(0, text=progress_text)
 
+    # Imported after the first elements are sent, so the page paints before langchain_openai is loaded
+    from services.llm_client import get_llm
+    llm = get_llm()
+
     for percent_complete in range(100):
         time.sleep(0.01)
         my_bar.progress(percent_complete + 1, text=progress_text)
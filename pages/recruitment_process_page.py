@@ -1,12 +1,64 @@
+import math
 import os
-
-from dotenv import load_dotenv
-
+import re
+import uuid
 from typing_extensions import TypedDict
-from langchain_openai import ChatOpenAI
 from typing import Literal
 from langgraph.graph import StateGraph, START,END
 import streamlit as st
+from services.async_runner import cancel_runs, iterate, run_sync, submit
+from services.llm_client import (
+    DEFAULT_MODEL, STREAMING, cached_ainvoke, chat_response, count_tokens, get_llm, route_model, routed_ainvoke,
+)
+from services.metrics import bind_session, get_metrics
+from services.metrics_callback import get_metrics_callback
+from services.prompts import build_prompt
+from services.question_bank import get_question_bank
+from services.question_index import QuestionIndex
+from services.session_store import get_checkpointer, get_session_store
+from services.skills import TECHNOLOGIES
+
+# Maximum size of the running summary of the candidate's weak areas
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "300"))
+# Minimum similarity of the weak-areas summaries for a speculative question to be kept
+SPECULATION_MIN_SIMILARITY = float(os.getenv("SPECULATION_MIN_SIMILARITY", "0.3"))
+# Number of most recent messages rendered directly; older ones are paginated
+TRANSCRIPT_WINDOW = int(os.getenv("TRANSCRIPT_WINDOW", "20"))
+# Number of questions tried before a near-duplicate of an asked question is accepted
+QUESTION_ATTEMPTS = int(os.getenv("QUESTION_ATTEMPTS", "3"))
+GREETING_PROMPT = build_prompt("greeting")
+# Graph nodes whose text results are shown as chat messages, with their state keys
+RENDERED_NODES = {
+    "rating_node": "rating",
+    "model_answer_node": "feedback",
+    "congratulation_node": "feedback",
+    "checking_node": "analysis",
+}
+# Rendered nodes whose results are also added to the transcript
+TRANSCRIPT_NODES = {"rating_node", "congratulation_node", "checking_node"}
+
+
+def is_rating(content):
+    """
+    Check that a rating response is a single number on the scale of 1-10.
+
+    :param content: Response of the rating prompt.
+    :type content: str
+    :return: True if the response is a valid rating.
+    :rtype: bool
+    """
+    content = content.strip()
+    return content.isdigit() and 1 <= int(content) <= 10
+
+
+class State(TypedDict, total=False):
+    graph_state: list
+    programming_languages: str
+    job_level: str
+    weak_areas: str
+    rating: str
+    feedback: str
+    analysis: str
 
 # --- STATE MANAGEMENT FUNCTIONS ---
 def initialize_state():
@@ -14,10 +66,23 @@ def initialize_state():
     Initialize the graph state in the Streamlit session if not already set.
 
     This function checks if the key ``graph_state`` exists in :data:`st.session_state`
-    and, if absent, initializes it as an empty list.
+    and, if absent, initializes it as an empty list. The running summary of the
+    candidate's weak areas is initialized as an empty string and the session gets a
+    unique ``session_id``.
+
+    ``graph_state`` only keeps the last :data:`TRANSCRIPT_WINDOW` messages; the whole
+    transcript is stored on disk and ``message_count`` holds its length. The questions
+    asked in the session are indexed in ``question_index``.
     """
     if "graph_state" not in st.session_state:
         st.session_state.graph_state = []
+        st.session_state.message_count = 0
+    if "weak_areas" not in st.session_state:
+        st.session_state.weak_areas = ""
+    if "question_index" not in st.session_state:
+        st.session_state.question_index = QuestionIndex()
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
 
 def get_last_message():
     """
@@ -34,14 +99,63 @@ def get_last_message():
 
 def add_message(role, content):
     """
-    Add a new message to the graph state.
+    Add a new message to the graph state and to the stored transcript of the session.
+
+    Messages older than the in-memory window are dropped from the graph state; they can
+    still be read from the session store.
 
     :param role: Role of the sender (e.g., 'user', 'assistant').
     :type role: str
     :param content: Message content.
     :type content: str
     """
+    get_session_store().append(st.session_state.session_id, st.session_state.message_count, role, content)
+    st.session_state.message_count += 1
     st.session_state.graph_state.append({"role": role, "content": content})
+    del st.session_state.graph_state[:-TRANSCRIPT_WINDOW]
+
+
+def asked_questions(messages):
+    """
+    Select the interview questions from a transcript.
+
+    Questions are the assistant messages answered by the user, and the last message of
+    the transcript when it is an unanswered assistant message.
+
+    :param messages: Messages of the transcript in order.
+    :type messages: list[dict]
+    :return: Question texts.
+    :rtype: list[str]
+    """
+    return [
+        message["content"] for message, following in zip(messages, messages[1:] + [{"role": "user"}])
+        if message["role"] == "assistant" and following["role"] == "user"
+    ]
+
+
+def resume_session(session_id):
+    """
+    Resume a stored session: load its recent messages, its workflow state and the index
+    of its asked questions.
+
+    :param session_id: Identifier of the session to resume.
+    :type session_id: str
+    :return: True if the session exists, False otherwise.
+    :rtype: bool
+    """
+    store = get_session_store()
+    count = store.count(session_id)
+    if count == 0:
+        return False
+    st.session_state.session_id = session_id
+    st.session_state.message_count = count
+    st.session_state.graph_state = store.load(session_id, max(count - TRANSCRIPT_WINDOW, 0), count)
+    st.session_state.question_index = QuestionIndex()
+    for question in asked_questions(store.load(session_id, 0, count)):
+        st.session_state.question_index.add(question)
+    snapshot = run_sync(build_graph().aget_state({"configurable": {"thread_id": session_id}}))
+    st.session_state.weak_areas = snapshot.values.get("weak_areas", "")
+    return True
 
 def get_message():
     """
@@ -58,46 +172,72 @@ def get_message():
 
 
 
-def display_messages():
+def render_messages(messages):
     """
-    Display all messages stored in the graph state using Streamlit's chat interface.
+    Display messages using Streamlit's chat interface.
+
+    :param messages: Messages to display.
+    :type messages: list[dict]
     """
-    for message in st.session_state.graph_state:
+    for message in messages:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
-def get_last_messages():
+
+def display_messages():
     """
-    Retrieve the last 50 messages from the graph state, or fewer if not available.
+    Display the transcript of the session using Streamlit's chat interface.
 
-    :return: A list of the most recent messages.
-    :rtype: list
+    The in-memory window of the last :data:`TRANSCRIPT_WINDOW` messages is rendered
+    directly. Older messages are collapsed into an expander showing one page of them at a
+    time, read from the session store, so neither memory nor the rendering cost of a rerun
+    grows with the length of the session.
     """
-    if "graph_state" in st.session_state:
-        last_messages = st.session_state.graph_state[-50:]
-        return last_messages
-    else:
-        return []
+    messages = st.session_state.graph_state
+    older = st.session_state.message_count - len(messages)
+    if older > 0:
+        pages = math.ceil(older / TRANSCRIPT_WINDOW)
+        with st.expander(f"Earlier messages ({older})"):
+            page = st.number_input("Page", min_value=1, max_value=pages, value=pages, key="transcript_page")
+            start = (page - 1) * TRANSCRIPT_WINDOW
+            stop = min(start + TRANSCRIPT_WINDOW, older)
+            render_messages(get_session_store().load(st.session_state.session_id, start, stop))
+    render_messages(messages)
+
+
+def fit_to_budget(llm, summary, token_budget=MEMORY_TOKEN_BUDGET):
+    """
+    Trim a summary to the token budget by dropping its last points.
+
+    :param llm: Chat model client used to count tokens.
+    :type llm: ChatOpenAI
+    :param summary: Summary with one point per line.
+    :type summary: str
+    :param token_budget: Maximum number of tokens.
+    :type token_budget: int
+    :return: Summary within the budget.
+    :rtype: str
+    """
+    lines = summary.strip().splitlines()
+    while len(lines) > 1 and count_tokens(llm, "\n".join(lines)) > token_budget:
+        lines.pop()
+    return "\n".join(lines)
 
 def options():
     """
     Display a sidebar interface for selecting technologies and job level.
 
     In the sidebar, the user can choose a set of technologies and a job level. If valid inputs are
-    provided, the recruitment process is initiated by calling :func:`app`.
+    provided, the question bank and the greeting are prepared in the background and the
+    recruitment process is initiated by calling :func:`app`.
     """
+    initialize_state()
     with st.sidebar:
         st.subheader("Select Technologies")
 
-        technologies = [
-            "AI/ML", "JS", "HTML", "PHP", "Ruby", "Python", "Java", ".NET", "Scala", "C",
-            "Mobile", "Testing", "DevOps", "Admin", "UX/UI", "PM", "Game",
-            "Analytics", "Security", "Data", "Go", "Support", "ERP"
-        ]
-
         selected_technologies = st.multiselect(
             "Choose technologies:",
-            technologies
+            TECHNOLOGIES
         )
 
         st.subheader("Select Job Level")
@@ -105,150 +245,130 @@ def options():
             "Choose the job level:",
             ["Chose level","Junior", "Mid", "Senior"]
         )
-        programming_languages = str(selected_technologies)
+        # Sorted, so the same selection always maps to the same prompts and question bank entries
+        programming_languages = str(sorted(selected_technologies))
         job_level = str(job_level)
         st.text('Chose the options and write "hi", "hello" or something to start recruitment process')
 
+        st.subheader("Session")
+        resume_id = st.text_input("Resume session by id:", key="resume_session_id").strip()
+        if resume_id and resume_id != st.session_state.session_id and not resume_session(resume_id):
+            st.error("Unknown session id")
+        st.caption(f"Session id: {st.session_state.session_id}")
+
+    # Work started for other options, e.g. a speculative question, is no longer needed
+    cancel_runs(("Technical Review", programming_languages, job_level))
     if selected_technologies != [] and job_level != "Chose level":
+        warm_greeting()
+        get_question_bank().ensure_stock(programming_languages, job_level, st.session_state.session_id)
         app(programming_languages, job_level)
 
 
-def app(programming_languages, job_level):
-    """
-    Main application logic for managing the recruitment workflow using Streamlit and LangChain.
-
-    This function sets up the necessary state, loads environment variables, and defines the workflow
-    nodes for processing recruitment interview questions and responses.
-
-    :param programming_languages: Selected programming technologies.
-    :type programming_languages: str
-    :param job_level: Selected job level.
-    :type job_level: str
-    :raises ValueError: If the OPENAI_API_KEY is not set in the environment.
+@st.cache_resource(max_entries=4, ttl=3600, show_spinner=False)
+def build_graph(model=DEFAULT_MODEL):
     """
-    initialize_state()
-    load_dotenv()
+    Build and compile the answer evaluation workflow graph for the given model.
 
-    class State(TypedDict):
-        graph_state: str
+    The compiled graph is cached for the whole server process, so it is built once per
+    model instead of on every script rerun. The selected technologies and job level are
+    passed through the graph state, which is checkpointed per session (``thread_id``) so
+    it survives restarts.
 
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    if not OPENAI_API_KEY:
-        raise ValueError("OPENAI_API_KEY is not set in the .env file")
+    The nodes are asynchronous and only store their results in the graph state; the graph
+    runs on the background event loop and :func:`evaluate_answer` renders the results.
 
-    llm = ChatOpenAI(model="gpt-4o")
+    The rating is answered by the model routed for ``rating_node`` (see
+    :func:`services.llm_client.route_model`) and repeated with ``model`` when it is not
+    a number of 1-10.
 
+    :param model: Name of the large chat model used by the graph nodes.
+    :type model: str
+    :return: Compiled workflow graph.
+    :rtype: CompiledStateGraph
+    """
+    llm = get_llm(model)
 
-    def rating_node(state):
+    async def rating_node(state):
         """
         Evaluate the user's answer and rate it on a scale of 1-10.
 
         :param state: Current graph state.
         :type state: dict
-        :return: Updated graph state.
+        :return: State update with the rating.
         :rtype: dict
         """
-        sys_message = state["graph_state"][-2]["content"]
-        last_message = state["graph_state"][-1]
-
-        rating_prompt = (
-            f"You are a professional recruiter specializing in hiring developers for roles involving {programming_languages}. "
-            f"The candidates are being recruited for positions at the {job_level} level. "
-            f"Your task is to rate the answer for the question. Based on your expertise as a recruiter, evaluate the given answer. "
-            f"The question is: {sys_message}. Rate the answer to the question: {last_message['content']} on a scale of 1-10. Return only a number, nothing else."
+        rating_prompt = build_prompt(
+            "rating",
+            programming_languages=state["programming_languages"],
+            job_level=state["job_level"],
+            question=state["graph_state"][-2]["content"],
+            answer=state["graph_state"][-1]["content"],
         )
 
-        llm_response = llm.invoke(rating_prompt)
-        with st.chat_message("assistant"):
-            st.markdown(llm_response.content)
-        add_message("assistant", llm_response.content)
-        state["graph_state"].append({"role": "assistant", "content": llm_response.content})
-        return state
+        return {"rating": await routed_ainvoke("rating_node", rating_prompt, model, validate=is_rating)}
 
-    def model_answer_node(state):
+    async def model_answer_node(state):
         """
         Generate a model answer for the given question.
 
         :param state: Current graph state.
         :type state: dict
-        :return: Updated graph state.
+        :return: State update with the model answer.
         :rtype: dict
         """
-        last_message = state["graph_state"][-3]
-        question = last_message["content"]
-
-        model_answer_prompt = (
-            f"You are a professional recruiter specializing in hiring developers for roles involving {programming_languages}. "
-            f"The candidates are being recruited for positions at the {job_level} level. Based on your expertise as a recruiter, "
-            f"and developer write a model answer for that question: {question}. The answer shouldn't be long. Focus on the most important information."
+        model_answer_prompt = build_prompt(
+            "model_answer",
+            programming_languages=state["programming_languages"],
+            job_level=state["job_level"],
+            question=state["graph_state"][-2]["content"],
         )
 
-        llm_response = llm.invoke(model_answer_prompt)
-        with st.chat_message("assistant"):
-            st.markdown(llm_response.content)
-        # st.session_state.graph_state = state["graph_state"]
-        state["graph_state"].append({"role": "assistant", "content": llm_response.content})
-        return state
+        return {"feedback": await cached_ainvoke(llm, model_answer_prompt)}
 
-    def congratulation_node(state):
+    async def congratulation_node(state):
         """
         Evaluate the user's answer and provide congratulations if appropriate.
 
         :param state: Current graph state.
         :type state: dict
-        :return: Updated graph state.
+        :return: State update with the congratulations.
         :rtype: dict
         """
-        last_message = state["graph_state"][-3]
-        last_message_content = last_message["content"]
-
-        congratulation_prompt = (
-            f"You are a professional recruiter specializing in hiring developers for roles involving {programming_languages}. "
-            f"The candidates are being recruited for positions at the {job_level} level. Evaluate the provided answer: {last_message_content}. "
-            f"If the answer is good, congratulate the candidate and return a concise list of the key strengths or positive aspects of the answer."
+        congratulation_prompt = build_prompt(
+            "congratulation",
+            programming_languages=state["programming_languages"],
+            job_level=state["job_level"],
+            question=state["graph_state"][-2]["content"],
+            answer=state["graph_state"][-1]["content"],
         )
 
-        llm_response = llm.invoke(congratulation_prompt)
-        with st.chat_message("assistant"):
-            st.markdown(llm_response.content)
-        add_message("assistant", llm_response.content)
-        state["graph_state"].append({"role": "assistant", "content": llm_response.content})
-        return state
+        return {"feedback": await cached_ainvoke(llm, congratulation_prompt)}
 
-    def checking_node(state):
+    async def checking_node(state):
         """
-        Analyze recent messages to identify areas where the user struggles and suggest improvements.
+        Update the running summary of areas where the user struggles and suggest improvements.
+
+        Only the newest exchange is sent together with the current summary, so the prompt
+        size stays flat over long interview sessions.
 
         :param state: Current graph state.
         :type state: dict
-        :return: Updated graph state.
+        :return: State update with the analysis and the updated summary.
         :rtype: dict
         """
-        last_messages = get_last_messages()
-        messages_content = [str(msg["content"]) for msg in last_messages if "content" in msg]
-        combined_content = "\n".join(messages_content)
-
-        analysis_prompt = (
-            f"You are a professional recruiter specializing in hiring developers for roles involving {programming_languages}. "
-            f"The candidates are being recruited for positions at the {job_level} level. Analyze the following messages and "
-            f"identify the areas where the user struggles the most. Return a short list of things worth revising. "
-            f"Analyze these messages: {combined_content}. Return only a short list of points."
+        analysis_prompt = build_prompt(
+            "weak_areas",
+            programming_languages=state["programming_languages"],
+            job_level=state["job_level"],
+            token_budget=MEMORY_TOKEN_BUDGET,
+            weak_areas=state["weak_areas"] or "empty",
+            question=state["graph_state"][0]["content"],
+            answer=state["graph_state"][1]["content"],
+            rating=state["rating"],
         )
 
-        llm_response = llm.invoke(analysis_prompt)
-        with st.chat_message("assistant"):
-            st.markdown(llm_response.content)
-        add_message("assistant", llm_response.content)
-
-        new_question_prompt = (
-            f"You are a professional recruiter specializing in hiring developers for roles involving {programming_languages}. "
-            f"The candidates are being recruited for positions at the {job_level} level. Your sole task is to ask professional "
-            f"and relevant interview questions appropriate for this role. Do not provide any explanations, feedback, or additional "
-            f"commentary—focus exclusively on formulating the questions. One question should be specific for one language. Ask only one question."
-        )
-
-        state["graph_state"].append({"role": "assistant", "content": new_question_prompt})
-        return state
+        content = await cached_ainvoke(llm, analysis_prompt)
+        return {"analysis": content, "weak_areas": fit_to_budget(llm, content)}
 
     def rating_mode(state) -> Literal["model_answer_node", "congratulation_node"]:
         """
@@ -259,8 +379,7 @@ def app(programming_languages, job_level):
         :return: The name of the next node ("model_answer_node" or "congratulation_node").
         :rtype: Literal["model_answer_node", "congratulation_node"]
         """
-        last_message = state["graph_state"][-1]
-        last_message_content = last_message["content"]
+        last_message_content = state["rating"]
         try:
             if int(last_message_content) < 7:
                 return "model_answer_node"
@@ -283,62 +402,304 @@ def app(programming_languages, job_level):
     builder1.add_edge("congratulation_node", "checking_node")
     builder1.add_edge("checking_node", END)
 
-    graph1 = builder1.compile()
+    return builder1.compile(checkpointer=get_checkpointer())
 
 
-    def run(programming_languages, job_level,message_for_question):
-        """
-        Generate and display a professional interview question based on the selected programming languages and job level.
-
-        :param programming_languages: Selected programming technologies.
-        :type programming_languages: str
-        :param job_level: Selected job level.
-        :type job_level: str
-        :param message_for_question: Additional conclusions or context for question generation.
-        :type message_for_question: str
-        :return: Generated interview question.
-        :rtype: str
-        """
-        main_prompt = (
-            f"You are a professional recruiter specializing in hiring developers for roles involving {programming_languages}. "
-            f"The candidates are being recruited for positions at the {job_level} level. Your sole task is to ask professional "
-            f"and relevant interview questions appropriate for this role. Do not provide any explanations, feedback, or additional "
-            f"commentary—focus exclusively on formulating the questions. One question should be specific for one language. Ask only one question."
-            f"In constructing the question, you can take these conclusions {message_for_question} into account but you dont need to, biger prioryty is to ask question for  all {programming_languages}"
-        )
+def question_prompt(programming_languages, job_level, message_for_question):
+    """
+    Build the prompt asking for the next interview question.
+
+    :param programming_languages: Selected programming technologies.
+    :type programming_languages: str
+    :param job_level: Selected job level.
+    :type job_level: str
+    :param message_for_question: Additional conclusions or context for question generation.
+    :type message_for_question: str
+    :return: Prompt messages for the language model.
+    :rtype: list[BaseMessage]
+    """
+    return build_prompt(
+        "question",
+        programming_languages=programming_languages,
+        job_level=job_level,
+        conclusions=message_for_question,
+    )
+
 
-        llm_response = llm.invoke(main_prompt)
-        with st.chat_message("assistant"):
-            st.markdown(llm_response.content)
-        add_message("assistant",llm_response.content)
-        return llm_response.content
+def run(programming_languages, job_level,message_for_question):
+    """
+    Generate and display a professional interview question based on the selected programming languages and job level.
 
+    A question that is a near-duplicate of one already asked in the session is removed
+    and generated again, at most :data:`QUESTION_ATTEMPTS` times in total; the asked
+    questions are checked locally instead of being added to the prompt.
+
+    :param programming_languages: Selected programming technologies.
+    :type programming_languages: str
+    :param job_level: Selected job level.
+    :type job_level: str
+    :param message_for_question: Additional conclusions or context for question generation.
+    :type message_for_question: str
+    :return: Generated interview question.
+    :rtype: str
+    """
+    llm = get_llm()
+    main_prompt = question_prompt(programming_languages, job_level, message_for_question)
+
+    index = st.session_state.question_index
+    for attempt in range(QUESTION_ATTEMPTS):
+        slot = st.empty()
+        with slot.container():
+            # Question generation must stay non-deterministic, so it bypasses the response cache
+            content = chat_response(llm, main_prompt, cache=False)
+        if not index.is_duplicate(content):
+            break
+        get_metrics().record("duplicate", "generated")
+        if attempt < QUESTION_ATTEMPTS - 1:
+            slot.empty()
+    index.add(content)
+    add_message("assistant",content)
+    return content
+
+
+@st.cache_resource(show_spinner=False)
+def warm_greeting():
+    """
+    Put the greeting into the response cache in the background, once per process.
+
+    :return: Future of the greeting text.
+    :rtype: concurrent.futures.Future
+    """
+    return submit(cached_ainvoke(get_llm(route_model("greeting")), GREETING_PROMPT))
+
+
+def show_question(question):
+    """
+    Display an already generated interview question and add it to the graph state.
+
+    :param question: Question text.
+    :type question: str
+    """
+    with st.chat_message("assistant"):
+        st.markdown(question)
+    st.session_state.question_index.add(question)
+    add_message("assistant", question)
+
+
+def take_question(bank, programming_languages, job_level):
+    """
+    Take the next question of the bank that is not a near-duplicate of an asked one.
+
+    Rejected questions are marked as seen by the bank, so they are not offered again.
+
+    :param bank: Question bank.
+    :type bank: QuestionBank
+    :param programming_languages: Selected programming technologies.
+    :type programming_languages: str
+    :param job_level: Selected job level.
+    :type job_level: str
+    :return: Question text, or None if the bank has no suitable question.
+    :rtype: str or None
+    """
+    for _ in range(QUESTION_ATTEMPTS):
+        question = bank.take(programming_languages, job_level, st.session_state.session_id)
+        if question is None or not st.session_state.question_index.is_duplicate(question):
+            return question
+        get_metrics().record("duplicate", "bank")
+    return None
+
+
+async def generate_question(programming_languages, job_level, message_for_question):
+    """
+    Generate an interview question without displaying it.
+
+    This runs on the background event loop, so it must not call any Streamlit element.
+
+    :param programming_languages: Selected programming technologies.
+    :type programming_languages: str
+    :param job_level: Selected job level.
+    :type job_level: str
+    :param message_for_question: Additional conclusions or context for question generation.
+    :type message_for_question: str
+    :return: Generated interview question.
+    :rtype: str
+    """
+    llm = get_llm()
+    return (await llm.ainvoke(question_prompt(programming_languages, job_level, message_for_question))).content
+
+
+def summary_similarity(first, second):
+    """
+    Compute the Jaccard similarity of the words of two summaries.
+
+    :param first: First summary.
+    :type first: str
+    :param second: Second summary.
+    :type second: str
+    :return: Similarity in the range 0-1.
+    :rtype: float
+    """
+    first_words = set(re.findall(r"\w+", first.lower()))
+    second_words = set(re.findall(r"\w+", second.lower()))
+    if not first_words and not second_words:
+        return 1.0
+    return len(first_words & second_words) / len(first_words | second_words)
+
+
+def reconcile_question(speculative, speculative_context, weak_areas):
+    """
+    Decide whether a speculatively generated question can be shown.
+
+    The speculative question was generated from the weak-areas summary of the previous
+    turn while the current answer was being evaluated. It is kept when that summary was
+    empty (the question then follows the main priority of covering all technologies) or
+    still similar to the updated summary; otherwise it is discarded.
+
+    :param speculative: Future of :func:`generate_question`.
+    :type speculative: concurrent.futures.Future
+    :param speculative_context: Summary the speculative question was generated from.
+    :type speculative_context: str
+    :param weak_areas: Summary updated by the evaluation of the current answer.
+    :type weak_areas: str
+    :return: The speculative question, or None if a new question must be generated.
+    :rtype: str or None
+    """
+    if speculative_context and summary_similarity(speculative_context, weak_areas) < SPECULATION_MIN_SIMILARITY:
+        speculative.cancel()
+        return None
+    try:
+        return speculative.result()
+    except Exception:
+        get_metrics().record("speculation", "failed", error=True)
+        return None
+
+
+def evaluate_answer(graph, state, config, scope):
+    """
+    Run the answer evaluation workflow and display its results as they arrive.
+
+    The workflow runs on the background event loop; its streamed tokens and node results
+    are rendered here and the rating, congratulations and analysis are added to the
+    transcript. Interrupting the script run (e.g. by changing the page) cancels it.
+
+    :param graph: Compiled workflow graph.
+    :type graph: CompiledStateGraph
+    :param state: Input state with the question and the answer.
+    :type state: dict
+    :param config: Run configuration with the session ``thread_id``.
+    :type config: dict
+    :param scope: Page and options the run belongs to.
+    :type scope: tuple
+    :return: Final values of the graph state.
+    :rtype: dict
+    """
+    placeholders = {}
+    streamed = {}
+    values = dict(state)
+
+    def placeholder(node):
+        if node not in placeholders:
+            with st.chat_message("assistant"):
+                placeholders[node] = st.empty()
+            streamed[node] = ""
+        return placeholders[node]
+
+    chunks = graph.astream(state, config=config, stream_mode=["messages", "updates"])
+    with iterate(chunks, scope=scope) as chunks:
+        for mode, chunk in chunks:
+            if mode == "messages":
+                message, metadata = chunk
+                node = metadata.get("langgraph_node")
+                if STREAMING and node in RENDERED_NODES:
+                    placeholder(node)
+                    streamed[node] += message.content
+                    placeholders[node].markdown(streamed[node])
+            else:
+                for node, update in chunk.items():
+                    values.update(update or {})
+                    if node in RENDERED_NODES:
+                        content = update[RENDERED_NODES[node]]
+                        placeholder(node).markdown(content)
+                        if node in TRANSCRIPT_NODES:
+                            add_message("assistant", content)
+    return values
+
+
+@st.fragment
+def app(programming_languages, job_level):
+    """
+    Main application logic for managing the recruitment workflow using Streamlit and LangChain.
+
+    The language model client and the compiled workflow graph are shared across reruns and
+    sessions; only the session state and the selected options are handled here. Questions
+    are served from the local question bank when it has unseen ones for this session.
+
+    The chat area is a fragment: submitting an answer or paging through earlier messages
+    reruns only this function, not the sidebar and the rest of the page.
+
+    :param programming_languages: Selected programming technologies.
+    :type programming_languages: str
+    :param job_level: Selected job level.
+    :type job_level: str
+    :raises ValueError: If the OPENAI_API_KEY is not set in the environment.
+    """
+    # Fragment reruns do not run main.py, so the metrics session is bound here as well
+    bind_session()
+    initialize_state()
+    greeting_llm = get_llm(route_model("greeting"))
+    graph1 = build_graph()
+    bank = get_question_bank()
 
     display_messages()
     if prompt := st.chat_input("Answer"):
 
-        if len(st.session_state.graph_state) == 0:
+        if st.session_state.message_count == 0:
             with st.chat_message("user"):
                 st.markdown(prompt)
             add_message("user", prompt)
-            llm_response = llm.invoke("Write a hi and tell that you are assistant to help in recruitment process")
-            with st.chat_message("assistant"):
-                st.markdown(llm_response.content)
-            add_message("assistant", llm_response.content)
-            message_for_question = get_message()
-            run(programming_languages, job_level,message_for_question)
+            content = chat_response(greeting_llm, GREETING_PROMPT)
+            add_message("assistant", content)
+            question = take_question(bank, programming_languages, job_level)
+            if question is None:
+                message_for_question = get_message()
+                run(programming_languages, job_level,message_for_question)
+            else:
+                show_question(question)
         else:
             with st.chat_message("user"):
                 st.markdown(prompt)
             add_message("user", prompt)
             answer = prompt
-            state = {"graph_state": [{"role": "system", "content": get_last_message()}]}
+            state = {
+                "graph_state": [{"role": "system", "content": get_last_message()["content"]}],
+                "programming_languages": programming_languages,
+                "job_level": job_level,
+                "weak_areas": st.session_state.weak_areas,
+            }
             state["graph_state"].append({"role": "assistant", "content": answer})
-            graph1.invoke(state)
-            message_for_question = get_message()
-            run(programming_languages, job_level,message_for_question)
-            if "graph_state" in st.session_state:
-                print(f"Liczba rekordów w graph_state: {len(st.session_state.graph_state)}")
+            # Serve the next question from the bank, or generate it while the answer is evaluated
+            question = take_question(bank, programming_languages, job_level)
+            scope = ("Technical Review", programming_languages, job_level)
+            if question is None:
+                speculative_context = st.session_state.weak_areas
+                speculative = submit(
+                    generate_question(programming_languages, job_level, speculative_context), scope
+                )
+            config = {
+                "configurable": {"thread_id": st.session_state.session_id},
+                "callbacks": [get_metrics_callback()],
+            }
+            result = evaluate_answer(graph1, state, config, scope)
+            st.session_state.weak_areas = result["weak_areas"]
+            if question is None:
+                question = reconcile_question(speculative, speculative_context, st.session_state.weak_areas)
+                if question is not None and st.session_state.question_index.is_duplicate(question):
+                    get_metrics().record("duplicate", "speculative")
+                    question = None
+            if question is None:
+                run(programming_languages, job_level, st.session_state.weak_areas)
+            else:
+                show_question(question)
 
 
 
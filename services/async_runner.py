@@ -0,0 +1,165 @@
+"""
+Background event loop running the workflows off the Streamlit script thread.
+
+Workflow graphs are executed with their asynchronous API (``astream``, ``ainvoke``) on
+one process-wide event loop living in a daemon thread. The script thread only receives
+the results and renders them, and the work can be cancelled: when the consuming script
+run is interrupted (the user changes the page or an option) or when the session moves
+to another page or other options, the pending model calls are cancelled instead of
+running to completion for nobody.
+"""
+import asyncio
+import concurrent.futures
+import contextlib
+import contextvars
+import queue
+import threading
+
+import streamlit as st
+
+# Seconds between checks whether a streamed workflow was cancelled
+_POLL_INTERVAL = 0.1
+_DONE = object()
+
+
+@st.cache_resource(show_spinner=False)
+def get_event_loop():
+    """
+    Return the process-wide event loop, running in a daemon thread.
+
+    :return: Running event loop.
+    :rtype: asyncio.AbstractEventLoop
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="workflow-loop", daemon=True).start()
+    return loop
+
+
+async def _with_context(coro, context):
+    """
+    Await a coroutine with the context variables of the thread that submitted it.
+
+    The event loop thread has its own context, so values such as the metrics session
+    and the request priority are copied into the task.
+    """
+    for variable, value in context.items():
+        variable.set(value)
+    return await coro
+
+
+def _runs():
+    if "workflow_runs" not in st.session_state:
+        st.session_state.workflow_runs = []
+    return st.session_state.workflow_runs
+
+
+def submit(coro, scope=None):
+    """
+    Schedule a coroutine on the background event loop.
+
+    :param coro: Coroutine to run.
+    :type coro: Coroutine
+    :param scope: Page and options the work belongs to, e.g. ``("Technical Review", ...)``.
+        Scoped work of the session is cancelled by :func:`cancel_runs` when the session
+        leaves the scope.
+    :type scope: tuple or None
+    :return: Future of the coroutine result; cancelling it cancels the coroutine.
+    :rtype: concurrent.futures.Future
+    """
+    future = asyncio.run_coroutine_threadsafe(_with_context(coro, contextvars.copy_context()), get_event_loop())
+    if scope is not None:
+        runs = _runs()
+        runs[:] = [(run_scope, run) for run_scope, run in runs if not run.done()]
+        runs.append((scope, future))
+    return future
+
+
+def run_sync(coro, timeout=None):
+    """
+    Run a coroutine on the background event loop and wait for its result.
+
+    :param coro: Coroutine to run.
+    :type coro: Coroutine
+    :param timeout: Maximum seconds to wait.
+    :type timeout: float or None
+    :return: Result of the coroutine.
+    """
+    return submit(coro).result(timeout)
+
+
+def cancel_runs(keep):
+    """
+    Cancel the scoped work of the session that does not belong to the current scope.
+
+    :param keep: Current scope; work whose scope starts with it is kept.
+    :type keep: tuple
+    :return: Number of cancelled runs.
+    :rtype: int
+    """
+    cancelled = 0
+    kept = []
+    for scope, future in _runs():
+        if future.done():
+            continue
+        if scope[:len(keep)] == keep:
+            kept.append((scope, future))
+        elif future.cancel():
+            cancelled += 1
+    st.session_state.workflow_runs = kept
+    return cancelled
+
+
+@contextlib.contextmanager
+def iterate(async_iterable, scope=None):
+    """
+    Consume an asynchronous iterator running on the background event loop.
+
+    The items are produced on the event loop and handed to the calling thread. Leaving
+    the ``with`` block early, including by an exception such as the interruption of the
+    Streamlit script run, cancels the iteration and the work behind it.
+
+    Example::
+
+        with iterate(graph.astream(state)) as chunks:
+            for chunk in chunks:
+                ...
+
+    :param async_iterable: Asynchronous iterator, e.g. ``graph.astream(...)``.
+    :type async_iterable: AsyncIterator
+    :param scope: Page and options the work belongs to; see :func:`submit`.
+    :type scope: tuple or None
+    :return: Context manager yielding a synchronous iterator of the items.
+    :rtype: contextlib.AbstractContextManager[Iterator]
+    """
+    items = queue.Queue()
+
+    async def pump():
+        try:
+            async for item in async_iterable:
+                items.put(item)
+        finally:
+            items.put(_DONE)
+
+    future = submit(pump(), scope)
+
+    def consume():
+        while True:
+            try:
+                item = items.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                if future.cancelled():
+                    return
+                continue
+            if item is _DONE:
+                break
+            yield item
+        try:
+            # Re-raise an exception of the workflow
+            future.result()
+        except concurrent.futures.CancelledError:
+            pass
+
+    try:
+        yield consume()
+    finally:
+        future.cancel()
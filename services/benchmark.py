@@ -0,0 +1,259 @@
+"""
+Offline performance benchmark of the application workflows.
+
+Every scenario runs against a local stand-in for the OpenAI API from
+:mod:`services.fake_openai`, so latency and throughput can be measured without
+network access or API credits. Caches, session and metrics files are written to a
+temporary directory, so runs do not affect each other or the local application data.
+
+Scenarios:
+
+- ``analyze_cv``: the Analyze CV graph on a new CV each run (cold response cache);
+- ``analyze_cv_revised``: the Analyze CV graph on a revision of the same CV changing
+  one section each run (only that section is analyzed again);
+- ``analyze_cv_cached``: the Analyze CV graph on the same CV (warm response cache);
+- ``screening``: batch screening of ``--batch-size`` CVs per run;
+- ``technical_review``: one Technical Review turn of the Streamlit page, answered
+  through :class:`streamlit.testing.v1.AppTest`.
+
+Besides the latency and throughput, every scenario reports the share of its prompt
+tokens served from the prompt cache imitated by the fake server, which drops when a
+change breaks the stable prefix of the prompts (see :mod:`services.prompts`).
+
+Results can be saved and compared with a previous run; the command exits with status 1
+when a scenario got slower or its cached prompt share fell by more than the tolerance::
+
+    python -m services.benchmark --output baseline.json
+    python -m services.benchmark --baseline baseline.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+import warnings
+
+import numpy as np
+
+from services.fake_openai import FakeOpenAIServer
+
+SCENARIOS = ["analyze_cv", "analyze_cv_revised", "analyze_cv_cached", "screening", "technical_review"]
+
+SAMPLE_CV = (
+    "Jane Doe - Python Developer\n"
+    "Experience: 4 years of backend development with Python, Django and PostgreSQL.\n"
+    "Skills: Python, SQL, Docker, REST APIs, unit testing.\n"
+    "Languages: English (C1), Polish (native)."
+)
+SAMPLE_REQUIREMENTS = (
+    "Mid Python Developer\n"
+    "Requirements: 3+ years of commercial experience with Python, web frameworks and SQL databases.\n"
+    "Nice to have: Docker, cloud services. English at B2 level."
+)
+
+
+def _configure_environment(directory, base_url):
+    """
+    Point the application at the fake server and at temporary storage.
+
+    Must run before the application modules are imported, because they read their
+    settings at import time.
+    """
+    os.environ.update({
+        "OPENAI_API_KEY": "fake",
+        "OPENAI_BASE_URL": base_url,
+        "OPENAI_API_BASE": base_url,
+        "LLM_CACHE_PATH": os.path.join(directory, "llm_responses.sqlite"),
+        "QUESTION_BANK_PATH": os.path.join(directory, "question_bank.sqlite"),
+        "SESSION_DB_PATH": os.path.join(directory, "sessions.sqlite"),
+        "MATCH_STORE_PATH": os.path.join(directory, "profiles.sqlite"),
+        "METRICS_PATH": os.path.join(directory, "metrics.json"),
+    })
+    # Measure the workflows, not the rate limits, unless limits are set explicitly
+    os.environ.setdefault("LLM_RPM", "0")
+    os.environ.setdefault("LLM_TPM", "0")
+
+
+def _sample_cv(revision):
+    """
+    Return the sample CV: unchanged, with its last section revised or with every section new.
+    """
+    reference = uuid.uuid4().hex
+    if revision == "revised":
+        return f"{SAMPLE_CV} Reference: {reference}"
+    if revision == "new":
+        return "\n".join(f"{line} ({reference})" for line in SAMPLE_CV.splitlines())
+    return SAMPLE_CV
+
+
+def _analyze_cv(iterations, revision):
+    from services.async_runner import iterate
+    from services.cv_workflow import build_graph
+
+    graph = build_graph()
+    durations = []
+    for _ in range(iterations):
+        cv_text = _sample_cv(revision)
+        state = {"cv_text": cv_text, "requirements_text": SAMPLE_REQUIREMENTS}
+        start = time.perf_counter()
+        with iterate(graph.astream(state, stream_mode=["messages", "updates"])) as chunks:
+            for _ in chunks:
+                pass
+        durations.append(time.perf_counter() - start)
+    return durations, iterations
+
+
+def _screening(iterations, batch_size, concurrency):
+    import asyncio
+
+    from services.cv_workflow import screen_candidates
+    from services.llm_client import get_llm
+
+    durations = []
+    for _ in range(iterations):
+        cvs = [(f"cv_{index}.docx", f"{SAMPLE_CV}\nReference: {uuid.uuid4().hex}") for index in range(batch_size)]
+        start = time.perf_counter()
+        asyncio.run(screen_candidates(get_llm(), cvs, SAMPLE_REQUIREMENTS, concurrency, lambda *args: None))
+        durations.append(time.perf_counter() - start)
+    return durations, iterations * batch_size
+
+
+def _technical_review(iterations):
+    from streamlit.testing.v1 import AppTest
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(root)
+    at = AppTest.from_file(os.path.join(root, "main.py"), default_timeout=120).run()
+    at.sidebar.selectbox[0].select("Technical Review").run()
+    at.sidebar.multiselect[0].select("Python").run()
+    at.sidebar.selectbox[1].select("Mid").run()
+    at.chat_input[0].set_value("hi").run()
+    durations = []
+    for index in range(iterations):
+        start = time.perf_counter()
+        at.chat_input[0].set_value(f"My answer number {index} uses a dictionary and a generator.").run()
+        durations.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+    return durations, iterations
+
+
+def summarize(durations, items):
+    """
+    Summarize the measured run durations of one scenario.
+
+    :param durations: Wall time of every run in seconds.
+    :type durations: list[float]
+    :param items: Number of processed items (CVs, turns) in all runs.
+    :type items: int
+    :return: Number of runs, latency percentiles in milliseconds and throughput per second.
+    :rtype: dict
+    """
+    p50, p90, p99 = np.percentile(durations, [50, 90, 99]) * 1000
+    return {
+        "runs": len(durations),
+        "mean_ms": round(1000 * float(np.mean(durations)), 1),
+        "p50_ms": round(float(p50), 1),
+        "p90_ms": round(float(p90), 1),
+        "p99_ms": round(float(p99), 1),
+        "throughput_per_s": round(items / sum(durations), 3),
+    }
+
+
+def regressions(results, baseline, tolerance):
+    """
+    Compare benchmark results with a baseline.
+
+    :param results: Scenario summaries of the current run.
+    :type results: dict
+    :param baseline: Scenario summaries of the baseline run.
+    :type baseline: dict
+    :param tolerance: Allowed relative slowdown or drop of the cached prompt share, e.g. 0.2 for 20%.
+    :type tolerance: float
+    :return: Descriptions of the regressions found.
+    :rtype: list[str]
+    """
+    found = []
+    for scenario, summary in results.items():
+        previous = baseline.get(scenario)
+        if previous is None:
+            continue
+        if summary["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+            found.append(f"{scenario}: p50 {previous['p50_ms']} ms -> {summary['p50_ms']} ms")
+        if summary["throughput_per_s"] < previous["throughput_per_s"] * (1 - tolerance):
+            found.append(
+                f"{scenario}: throughput {previous['throughput_per_s']}/s -> {summary['throughput_per_s']}/s"
+            )
+        if summary.get("cached_prompt_share", 0) < previous.get("cached_prompt_share", 0) * (1 - tolerance):
+            found.append(
+                f"{scenario}: cached prompt share {previous['cached_prompt_share']} -> "
+                f"{summary.get('cached_prompt_share', 0)}"
+            )
+    return found
+
+
+def main(argv=None):
+    """
+    Command-line entry point of the benchmark.
+
+    :param argv: Command-line arguments; defaults to :data:`sys.argv`.
+    :type argv: list[str] or None
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the workflows against a local fake OpenAI server.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated scenarios to run")
+    parser.add_argument("--iterations", type=int, default=10, help="runs per scenario")
+    parser.add_argument("--batch-size", type=int, default=20, help="CVs per screening run")
+    parser.add_argument("--concurrency", type=int, default=8, help="CVs analyzed at once when screening")
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds before the first token of a response")
+    parser.add_argument("--token-interval", type=float, default=0.005, help="seconds between streamed tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--output", help="JSON file to save the results to")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown or cache share drop")
+    args = parser.parse_args(argv)
+
+    # Emitted by the OpenAI SDK for every structured response; irrelevant to the measurements
+    warnings.filterwarnings("ignore", message="Pydantic serializer warnings")
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory, \
+            FakeOpenAIServer(latency=args.latency, token_interval=args.token_interval,
+                             error_rate=args.error_rate) as server:
+        _configure_environment(directory, server.base_url)
+        runners = {
+            "analyze_cv": lambda: _analyze_cv(args.iterations, "new"),
+            "analyze_cv_revised": lambda: _analyze_cv(args.iterations, "revised"),
+            "analyze_cv_cached": lambda: _analyze_cv(args.iterations, "same"),
+            "screening": lambda: _screening(args.iterations, args.batch_size, args.concurrency),
+            "technical_review": lambda: _technical_review(args.iterations),
+        }
+        for scenario in scenarios:
+            requests_before = server.requests
+            prompt_before, cached_before = server.prompt_tokens, server.cached_tokens
+            results[scenario] = summarize(*runners[scenario]())
+            results[scenario]["requests"] = server.requests - requests_before
+            prompt_tokens = server.prompt_tokens - prompt_before
+            cached_share = (server.cached_tokens - cached_before) / prompt_tokens if prompt_tokens else 0.0
+            results[scenario]["cached_prompt_share"] = round(cached_share, 3)
+            print(f"{scenario:<20} " + "  ".join(f"{key}={value}" for key, value in results[scenario].items()))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            found = regressions(results, json.load(file), args.tolerance)
+        for regression in found:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
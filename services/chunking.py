@@ -0,0 +1,72 @@
+"""
+Splitting of oversized documents into chunks analyzed in parallel.
+
+A document whose token count exceeds :data:`DOCUMENT_CHUNK_TOKENS` is split at line
+boundaries into chunks of about that size, so each chunk can be analyzed by its own
+model call and the analyses combined afterwards. The tokens are counted once for the
+whole document; chunks are sized by the resulting characters per token, so splitting
+does not call the tokenizer again.
+"""
+import math
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+# Documents above this number of tokens are analyzed in chunks
+DOCUMENT_CHUNK_TOKENS = int(os.getenv("DOCUMENT_CHUNK_TOKENS", "3000"))
+
+
+def _split_line(line, max_chars):
+    """
+    Split a line longer than the chunk size at word boundaries, and words longer than
+    the chunk size anywhere.
+    """
+    pieces = []
+    current = ""
+    for word in line.split(" "):
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = ""
+        if len(word) > max_chars:
+            pieces.extend(word[start:start + max_chars] for start in range(0, len(word), max_chars))
+            # The last part may still share a chunk with the following words
+            word = pieces.pop()
+        current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_chunks(text, tokens, max_tokens=DOCUMENT_CHUNK_TOKENS):
+    """
+    Split a document into chunks of at most about ``max_tokens`` tokens.
+
+    Lines are kept whole unless a single line exceeds the chunk size.
+
+    :param text: Text content of the document.
+    :type text: str
+    :param tokens: Number of tokens of the whole text, counted by the caller.
+    :type tokens: int
+    :param max_tokens: Maximum number of tokens per chunk.
+    :type max_tokens: int
+    :return: The text itself if it fits, otherwise its chunks in order.
+    :rtype: list[str]
+    """
+    if tokens <= max_tokens or not text:
+        return [text]
+    max_chars = max(math.floor(len(text) * max_tokens / tokens), 1)
+    chunks = []
+    current = []
+    size = 0
+    for line in text.splitlines():
+        for piece in _split_line(line, max_chars) if len(line) > max_chars else [line]:
+            if current and size + len(piece) + 1 > max_chars:
+                chunks.append("\n".join(current))
+                current = []
+                size = 0
+            current.append(piece)
+            size += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
@@ -0,0 +1,87 @@
+"""
+Splitting of CVs into sections.
+
+A CV is split at its headings into the profile (everything before the first known
+heading), experience, skills, education, languages and other sections. Each section
+is normalized and identified by the hash of its content, so a revised CV can be
+compared with the previous revision section by section and only the changed sections
+analyzed again.
+"""
+import hashlib
+import re
+
+SECTIONS = ("profile", "experience", "skills", "education", "languages", "other")
+# Heading words of the sections; headings not listed start the "other" section
+SECTION_HEADINGS = {
+    "experience": (
+        "experience", "work experience", "professional experience", "employment", "employment history",
+        "work history", "career", "projects",
+    ),
+    "skills": (
+        "skills", "technical skills", "hard skills", "soft skills", "competencies", "key skills",
+        "technologies", "tech stack",
+    ),
+    "education": ("education", "certifications", "certificates", "courses", "training", "qualifications"),
+    "languages": ("languages", "language skills", "foreign languages"),
+    "other": ("interests", "hobbies", "achievements", "awards", "publications", "references", "volunteering"),
+}
+# Longest line, in words, still recognized as a heading
+MAX_HEADING_WORDS = 4
+
+_HEADINGS = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+
+
+def _heading(line):
+    """
+    Recognize a section heading, possibly followed by content on the same line.
+
+    :param line: Stripped line of the CV.
+    :type line: str
+    :return: Section and the content following the heading, or None for other lines.
+    :rtype: tuple[str, str] or None
+    """
+    title, colon, rest = line.partition(":")
+    title = re.sub(r"[^\w\s]", " ", title).strip().lower()
+    title = " ".join(title.split())
+    if len(title.split()) > MAX_HEADING_WORDS or title not in _HEADINGS:
+        return None
+    return _HEADINGS[title], rest.strip() if colon else ""
+
+
+def split_sections(cv_text):
+    """
+    Split a CV into its sections.
+
+    Lines are stripped and empty lines dropped, so reformatting a CV does not change its
+    sections. Content of repeated headings is merged into one section.
+
+    :param cv_text: Text content of the CV.
+    :type cv_text: str
+    :return: Text of every non-empty section, ordered as :data:`SECTIONS`.
+    :rtype: dict[str, str]
+    """
+    lines = {section: [] for section in SECTIONS}
+    current = "profile"
+    for line in cv_text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        heading = _heading(line)
+        if heading is not None:
+            current, line = heading
+            if not line:
+                continue
+        lines[current].append(line)
+    return {section: "\n".join(lines[section]) for section in SECTIONS if lines[section]}
+
+
+def section_hash(text):
+    """
+    Compute the hash identifying the content of a section.
+
+    :param text: Normalized text of the section, as returned by :func:`split_sections`.
+    :type text: str
+    :return: Hex digest of the text.
+    :rtype: str
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
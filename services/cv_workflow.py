@@ -0,0 +1,488 @@
+"""
+CV analysis workflow independent of the user interface.
+
+This module holds the prompts, the LangGraph workflow comparing a CV with job
+requirements and the concurrent screening of many CVs. The workflow analyzes a CV
+section by section (see :mod:`services.cv_sections`) and aggregates the assessment
+locally, so when a revised CV is analyzed again only its changed sections reach the
+model; the analyses of the unchanged ones come from the response cache. Documents
+above the token budget of :mod:`services.chunking` are analyzed map-reduce style: in
+parallel chunks whose summaries are combined in a final step. Nodes only compute and store
+their results in the graph state; rendering is left to the callers, so the same
+workflow serves the Analyze CV page and the headless :mod:`services.screening` CLI.
+"""
+import asyncio
+from typing import Literal
+
+import pandas as pd
+import streamlit as st
+from langgraph.graph import StateGraph, START, END
+from pydantic import BaseModel, Field
+from typing_extensions import TypedDict
+
+from services.chunking import split_chunks
+from services.cv_sections import section_hash, split_sections
+from services.http_client import batch_priority
+from services.llm_client import DEFAULT_MODEL, cached_ainvoke, count_tokens, get_llm, routed_ainvoke
+from services.matching import CV, MATCH_WEIGHTS, REQUIREMENTS, document_name, get_profile_store, match_matrix
+from services.prompts import build_prompt
+from services.skills import coverage_percent, extract_skills
+
+
+class Assessment(BaseModel):
+    """
+    Structured result of a CV or job requirements analysis.
+
+    Scores are ordered as :data:`SCORE_CATEGORIES` by :meth:`scores`.
+    """
+    summary: str = Field(description="Detailed summary of technical skills, soft skills, languages and professional experience")
+    experience: int = Field(ge=1, le=10, description="Professional experience on a scale of 1-10")
+    technical_skills: int = Field(ge=1, le=10, description="Technical skills on a scale of 1-10")
+    languages: int = Field(ge=1, le=10, description="Language proficiency on a scale of 1-10")
+
+    def scores(self):
+        """
+        Return the numeric assessment.
+
+        :return: Experience, technical skills and languages scores.
+        :rtype: list[int]
+        """
+        return [self.experience, self.technical_skills, self.languages]
+
+
+class SectionAssessment(BaseModel):
+    """
+    Structured result of the analysis of one CV section.
+
+    Scores are None for aspects the section tells nothing about.
+    """
+    summary: str = Field(description="Short summary of the skills and experience shown in the section")
+    experience: int | None = Field(ge=1, le=10, description="Professional experience on a scale of 1-10, or null")
+    technical_skills: int | None = Field(ge=1, le=10, description="Technical skills on a scale of 1-10, or null")
+    languages: int | None = Field(ge=1, le=10, description="Language proficiency on a scale of 1-10, or null")
+
+
+class State(TypedDict, total=False):
+    cv_text: str
+    cv_name: str
+    cv_sections: dict
+    analyze_sections: bool
+    requirements_text: str
+    requirements_name: str
+    cv_analysis: str
+    requirements_analysis: str
+    requirements_scores: list
+    cv_scores: list
+    match: float
+    generate_model_cv: bool
+    model_cv: str
+
+
+SCORE_CATEGORIES = ['Experience', 'Technical Skills', 'Languages']
+# Fields of the assessments holding the scores of SCORE_CATEGORIES
+SCORE_FIELDS = ("experience", "technical_skills", "languages")
+
+
+def cv_analysis_prompt(cv_text):
+    """
+    Build the prompt analyzing a CV into an :class:`Assessment`.
+
+    :param cv_text: Text content of the CV.
+    :type cv_text: str
+    :return: Prompt messages for the language model.
+    :rtype: list[BaseMessage]
+    """
+    return build_prompt("cv_analysis", cv_text=cv_text)
+
+
+def cv_section_prompt(section, text):
+    """
+    Build the prompt analyzing one CV section into a :class:`SectionAssessment`.
+
+    :param section: Name of the section, one of :data:`services.cv_sections.SECTIONS`.
+    :type section: str
+    :param text: Text of the section.
+    :type text: str
+    :return: Prompt messages for the language model.
+    :rtype: list[BaseMessage]
+    """
+    return build_prompt("cv_section", section=section, text=text)
+
+
+def aggregate_sections(assessments):
+    """
+    Combine the analyses of the CV sections into the assessment of the whole CV.
+
+    The summary lists the section summaries in order. Every score is the highest one
+    given by a section, as a skill shown anywhere in the CV counts; a score no section
+    gives is 1.
+
+    :param assessments: Analyses of the sections by section name.
+    :type assessments: dict[str, SectionAssessment]
+    :return: Summary and scores ordered as :data:`SCORE_CATEGORIES`.
+    :rtype: tuple[str, list[int]]
+    """
+    summary = "\n\n".join(
+        f"**{section.capitalize()}**: {assessment.summary}" for section, assessment in assessments.items()
+    )
+    scores = []
+    for field in SCORE_FIELDS:
+        given = [getattr(assessment, field) for assessment in assessments.values()]
+        scores.append(max((score for score in given if score is not None), default=1))
+    return summary, scores
+
+
+def requirements_analysis_prompt(requirements_text):
+    """
+    Build the prompt analyzing job requirements into an :class:`Assessment`.
+
+    :param requirements_text: Text content of the job requirements.
+    :type requirements_text: str
+    :return: Prompt messages for the language model.
+    :rtype: list[BaseMessage]
+    """
+    return build_prompt("requirements_analysis", requirements_text=requirements_text)
+
+
+async def analyze_document(task, text, prompt, document, model=DEFAULT_MODEL, schema=Assessment):
+    """
+    Analyze a document, in parallel chunks if it exceeds the chunk token budget.
+
+    The tokens of the document are counted locally. A document within the budget is
+    analyzed by one model call. A larger one is split by :func:`services.chunking.split_chunks`
+    and its chunks are analyzed concurrently (map); their summaries are then combined
+    into one by the model and every score is the highest one of the chunks (reduce), so
+    the latency grows with the size of one chunk rather than of the whole document.
+
+    :param task: Name of the task routing the model calls, see
+        :func:`services.llm_client.route_model`.
+    :type task: str
+    :param text: Text content of the document.
+    :type text: str
+    :param prompt: Builds the analysis prompt of a text.
+    :type prompt: Callable[[str], list[BaseMessage]]
+    :param document: Description of the document in the reduce prompt, e.g. ``"CV"``.
+    :type document: str
+    :param model: Name of the large chat model.
+    :type model: str
+    :param schema: Structured result of the analysis.
+    :type schema: type[Assessment] or type[SectionAssessment]
+    :return: Analysis of the whole document.
+    :rtype: Assessment or SectionAssessment
+    """
+    chunks = split_chunks(text, count_tokens(get_llm(model), text))
+    assessments = await asyncio.gather(*(routed_ainvoke(task, prompt(chunk), model, schema=schema) for chunk in chunks))
+    if len(assessments) == 1:
+        return assessments[0]
+    summaries = "\n\n".join(
+        f"Part {index}: {assessment.summary}" for index, assessment in enumerate(assessments, start=1)
+    )
+    summary = await routed_ainvoke(
+        "summary_reduce", build_prompt("summary_reduce", document=document, summaries=summaries), model
+    )
+    scores = {}
+    for field in SCORE_FIELDS:
+        given = [getattr(assessment, field) for assessment in assessments]
+        scores[field] = max((score for score in given if score is not None), default=None)
+    return schema(summary=summary, **scores)
+
+
+@st.cache_resource(max_entries=4, ttl=3600, show_spinner=False)
+def build_graph(model=DEFAULT_MODEL):
+    """
+    Build and compile the CV analysis workflow graph for the given model.
+
+    The compiled graph is cached for the whole server process, so it is built once per
+    model instead of on every script rerun. Session data (CV and requirements texts) is
+    passed through the graph state.
+
+    The CV sections and the requirements are analyzed in parallel branches which are joined by
+    :func:`skills_node`, so the two independent LLM calls overlap instead of running one
+    after another. A requirements analysis already present in the input state is reused,
+    and the model CV is skipped when ``generate_model_cv`` is False. With
+    ``analyze_sections`` set to False, the CV is analyzed whole, as distinct screened CVs
+    gain nothing from per-section reuse.
+
+    The nodes are asynchronous, so the graph is run with ``astream``/``ainvoke`` (see
+    :mod:`services.async_runner`) and a cancelled run stops its pending model calls.
+
+    The analyses are answered by the model routed for their nodes (see
+    :func:`services.llm_client.route_model`), with ``model`` as the fallback.
+
+    :param model: Name of the large chat model used by the graph nodes.
+    :type model: str
+    :return: Compiled workflow graph.
+    :rtype: CompiledStateGraph
+    """
+    llm = get_llm(model)
+
+    async def analise_cv_node(state):
+        """
+        Analyze the CV text and extract technical, soft, and language skills.
+
+        The sections are analyzed concurrently, long sections in chunks (see
+        :func:`analyze_document`), and the analyses of sections seen before are served
+        by the response cache. The hashes of the sections are returned, so
+        callers can tell which sections changed since a previous revision. When
+        ``analyze_sections`` is False, the whole CV is analyzed in one call instead.
+
+        :param state: Current graph state.
+        :type state: dict
+        :return: State update with the CV analysis and, for sectioned analyses, the
+            section hashes.
+        :rtype: dict
+        """
+        if not state.get("analyze_sections", True):
+            assessment = await analyze_document("analise_cv_node", state["cv_text"], cv_analysis_prompt, "CV", model)
+            return {"cv_analysis": assessment.summary, "cv_scores": assessment.scores()}
+        sections = split_sections(state["cv_text"])
+        assessments = await asyncio.gather(*(
+            analyze_document(
+                "analise_cv_node", text, lambda chunk, section=section: cv_section_prompt(section, chunk),
+                f"{section} section of a CV", model, SectionAssessment,
+            )
+            for section, text in sections.items()
+        ))
+        summary, scores = aggregate_sections(dict(zip(sections, assessments)))
+        return {
+            "cv_analysis": summary,
+            "cv_scores": scores,
+            "cv_sections": {section: section_hash(text) for section, text in sections.items()},
+        }
+
+    async def analise_requirements_node(state):
+        """
+        Analyze the job requirements text and extract key skill and experience expectations.
+
+        :param state: Current graph state.
+        :type state: dict
+        :return: State update with the requirements analysis.
+        :rtype: dict
+        """
+        if state.get("requirements_analysis") and state.get("requirements_scores"):
+            return {}
+        assessment = await analyze_document(
+            "analise_requirements_node", state["requirements_text"], requirements_analysis_prompt,
+            "job requirements document", model,
+        )
+
+        return {"requirements_analysis": assessment.summary, "requirements_scores": assessment.scores()}
+
+    async def skills_node(state):
+        """
+        Compare the skill scores of the CV against the job requirements.
+
+        This node joins the two parallel analysis branches. The scores come from the
+        structured analyses, so the comparison is computed locally without an LLM call.
+        Both score vectors are kept in the profile store of :mod:`services.matching`,
+        named by ``cv_name`` and ``requirements_name`` or by the first lines of the
+        documents.
+
+        :param state: Current graph state.
+        :type state: dict
+        :return: State update with the match percentage.
+        :rtype: dict
+        """
+        store = get_profile_store()
+        for kind, text_key, name_key, scores_key in (
+            (CV, "cv_text", "cv_name", "cv_scores"),
+            (REQUIREMENTS, "requirements_text", "requirements_name", "requirements_scores"),
+        ):
+            text = state[text_key]
+            store.add(kind, state.get(name_key) or document_name(text), text, state[scores_key])
+        return {"match": match_score(state["cv_scores"], state["requirements_scores"])}
+
+    async def model_cv_node(state):
+        """
+        Generate a model CV tailored to job requirements and user-provided CV content.
+
+        :param state: Current graph state.
+        :type state: dict
+        :return: State update with the model CV.
+        :rtype: dict
+        """
+        prompt = build_prompt(
+            "model_cv", requirements_analysis=state["requirements_analysis"], cv_text=state["cv_text"]
+        )
+
+        return {"model_cv": await cached_ainvoke(llm, prompt)}
+
+    def model_cv_mode(state) -> Literal["model_cv_node", "__end__"]:
+        """
+        Determine whether the model CV should be generated.
+
+        :param state: Current graph state.
+        :type state: dict
+        :return: The name of the next node.
+        :rtype: Literal["model_cv_node", "__end__"]
+        """
+        if state.get("generate_model_cv", True):
+            return "model_cv_node"
+        return END
+
+    # Build the workflow graph: both analyses fan out from START and join in skills_node
+    builder = StateGraph(State)
+    builder.add_node("analise_cv_node", analise_cv_node)
+    builder.add_node("analise_requirements_node", analise_requirements_node)
+    builder.add_node("skills_node", skills_node)
+    builder.add_node("model_cv_node", model_cv_node)
+
+
+    builder.add_edge(START, "analise_cv_node")
+    builder.add_edge(START, "analise_requirements_node")
+    builder.add_edge(["analise_cv_node", "analise_requirements_node"], "skills_node")
+    builder.add_conditional_edges("skills_node", model_cv_mode)
+    builder.add_edge("model_cv_node", END)
+
+    return builder.compile()
+
+
+def match_score(cv_scores, requirements_scores, weights=MATCH_WEIGHTS):
+    """
+    Compute how well a candidate covers the requirements.
+
+    Each category contributes the candidate score divided by the required score, capped
+    at 1, so exceeding the requirements in one category does not hide gaps in another.
+    See :func:`services.matching.match_matrix`, which compares many candidates at once.
+
+    :param cv_scores: Candidate scores ordered as :data:`SCORE_CATEGORIES`.
+    :type cv_scores: list[int]
+    :param requirements_scores: Required scores ordered as :data:`SCORE_CATEGORIES`.
+    :type requirements_scores: list[int]
+    :param weights: Weights of the categories.
+    :type weights: list[float]
+    :return: Match percentage in the range 0-100.
+    :rtype: float
+    """
+    return float(match_matrix([cv_scores], [requirements_scores], weights)[0, 0])
+
+
+async def analyze_candidate(llm, name, cv_text, requirements_scores, semaphore, required_skills=()):
+    """
+    Analyze one CV against an already analyzed set of requirements.
+
+    Screened CVs are distinct documents rather than revisions, so they are analyzed
+    whole instead of section by section. The candidate profile is kept in the profile
+    store of :mod:`services.matching`. The skill coverage of :mod:`services.skills` is
+    matched locally, so it is ranked even when the model analysis fails.
+
+    :param llm: Chat model client of the large model, used when the CV analysis is not
+        routed to a smaller one.
+    :type llm: ChatOpenAI
+    :param name: Name of the CV file shown in the ranking.
+    :type name: str
+    :param cv_text: Text content of the CV.
+    :type cv_text: str
+    :param requirements_scores: Scores of the job requirements.
+    :type requirements_scores: list[int]
+    :param semaphore: Semaphore limiting the number of candidates analyzed at once.
+    :type semaphore: asyncio.Semaphore
+    :param required_skills: Skills found in the job requirements.
+    :type required_skills: Iterable[str]
+    :return: Ranking row with the candidate scores and skill coverage, or with the skill
+        coverage and an ``Error`` on failure.
+    :rtype: dict
+    """
+    skills = coverage_percent(extract_skills(cv_text), required_skills)
+    try:
+        async with semaphore:
+            assessment = await analyze_document("analise_cv_node", cv_text, cv_analysis_prompt, "CV", llm.model_name)
+        cv_scores = assessment.scores()
+    except Exception as e:
+        return {"Candidate": name, "Skills %": skills, "Error": str(e)}
+    get_profile_store().add(CV, name, cv_text, cv_scores)
+    row = {"Candidate": name, "Match %": match_score(cv_scores, requirements_scores), "Skills %": skills}
+    row.update(zip(SCORE_CATEGORIES, cv_scores))
+    return row
+
+
+async def stream_candidates(llm, cvs, requirements_text, concurrency):
+    """
+    Analyze many CVs against one job requirements document, yielding each candidate as
+    soon as it is finished.
+
+    The requirements are analyzed once, then the CVs are processed concurrently with at
+    most ``concurrency`` candidates in flight, as batch requests of
+    :mod:`services.http_client`. Closing or cancelling the iteration cancels the
+    candidates still being analyzed.
+
+    :param llm: Chat model client.
+    :type llm: ChatOpenAI
+    :param cvs: Pairs of CV name and CV text.
+    :type cvs: list[tuple[str, str]]
+    :param requirements_text: Text content of the job requirements.
+    :type requirements_text: str
+    :param concurrency: Maximum number of candidates analyzed at once.
+    :type concurrency: int
+    :return: Asynchronous iterator of the ranking rows, in completion order.
+    :rtype: AsyncIterator[dict]
+    """
+    # Screening is batch work: interactive Technical Review requests are served first
+    with batch_priority():
+        requirements = await analyze_document(
+            "analise_requirements_node", requirements_text, requirements_analysis_prompt,
+            "job requirements document", llm.model_name,
+        )
+        get_profile_store().add(REQUIREMENTS, document_name(requirements_text), requirements_text, requirements.scores())
+        required_skills = extract_skills(requirements_text)
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = [
+            asyncio.create_task(
+                analyze_candidate(llm, name, cv_text, requirements.scores(), semaphore, required_skills)
+            )
+            for name, cv_text in cvs
+        ]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def screen_candidates(llm, cvs, requirements_text, concurrency, on_result):
+    """
+    Analyze many CVs against one job requirements document.
+
+    The candidates are analyzed by :func:`stream_candidates`; ``on_result`` is called as
+    soon as each candidate is finished, in completion order.
+
+    :param llm: Chat model client.
+    :type llm: ChatOpenAI
+    :param cvs: Pairs of CV name and CV text.
+    :type cvs: list[tuple[str, str]]
+    :param requirements_text: Text content of the job requirements.
+    :type requirements_text: str
+    :param concurrency: Maximum number of candidates analyzed at once.
+    :type concurrency: int
+    :param on_result: Callback receiving the ranking row, the number of finished and the
+        total number of candidates.
+    :type on_result: Callable[[dict, int, int], None]
+    :return: Ranking rows of all candidates.
+    :rtype: list[dict]
+    """
+    results = []
+    async for row in stream_candidates(llm, cvs, requirements_text, concurrency):
+        results.append(row)
+        on_result(row, len(results), len(cvs))
+    return results
+
+
+def rank_candidates(results):
+    """
+    Build the ranking table of screened candidates, best match first.
+
+    :param results: Ranking rows returned by :func:`analyze_candidate`.
+    :type results: list[dict]
+    :return: Ranking table indexed by rank.
+    :rtype: pandas.DataFrame
+    """
+    df = pd.DataFrame(results)
+    if "Match %" in df:
+        df = df.sort_values(["Match %"] + SCORE_CATEGORIES + ["Skills %"], ascending=False, na_position="last")
+    elif "Skills %" in df:
+        # No model analysis succeeded; rank by the locally matched skills alone
+        df = df.sort_values("Skills %", ascending=False, na_position="last")
+    df.index = range(1, len(df) + 1)
+    df.index.name = "Rank"
+    return df
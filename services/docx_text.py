@@ -0,0 +1,119 @@
+"""
+Text extraction from uploaded .docx documents.
+
+CVs keep a lot of their content outside plain body paragraphs (contact details in
+headers, skills and experience in tables), so the extraction walks headers, body
+paragraphs and tables in document order. Extracted texts are cached by the hash of
+the uploaded bytes, so Streamlit reruns do not parse the same file again.
+"""
+import hashlib
+import io
+
+import streamlit as st
+from docx import Document
+from docx.table import Table
+
+
+def _table_text(table):
+    """
+    Convert a table into text with one line per row and cells separated by ``|``.
+
+    Merged cells are returned by python-docx once per grid column, so repeated
+    neighbouring cells are skipped.
+
+    :param table: Table from a .docx document.
+    :type table: docx.table.Table
+    :return: Text content of the table.
+    :rtype: str
+    """
+    lines = []
+    for row in table.rows:
+        cells = []
+        for cell in row.cells:
+            text = cell.text.strip()
+            if text and (not cells or cells[-1] != text):
+                cells.append(text)
+        if cells:
+            lines.append(" | ".join(cells))
+    return "\n".join(lines)
+
+
+def _block_text(container):
+    """
+    Convert paragraphs and tables of a document part into text, in document order.
+
+    :param container: Document body, header or footer.
+    :type container: docx.blkcntnr.BlockItemContainer
+    :return: Text content of the part.
+    :rtype: str
+    """
+    blocks = []
+    for item in container.iter_inner_content():
+        if isinstance(item, Table):
+            blocks.append(_table_text(item))
+        else:
+            blocks.append(item.text)
+    return "\n".join(blocks)
+
+
+def document_text(document):
+    """
+    Extract the text of a .docx document including headers, footers and tables.
+
+    :param document: Parsed .docx document.
+    :type document: docx.document.Document
+    :return: Text content of the document.
+    :rtype: str
+    """
+    headers = []
+    footers = []
+    for section in document.sections:
+        for part, texts in ((section.header, headers), (section.footer, footers)):
+            if part.is_linked_to_previous:
+                continue
+            text = _block_text(part).strip()
+            if text and text not in texts:
+                texts.append(text)
+    return "\n".join(headers + [_block_text(document)] + footers)
+
+
+def read_docx(path):
+    """
+    Extract the text of a .docx file from disk.
+
+    :param path: Path of the .docx file.
+    :type path: str
+    :return: Text content of the document.
+    :rtype: str
+    """
+    return document_text(Document(path))
+
+
+def content_hash(data):
+    """
+    Compute the hash identifying uploaded file contents.
+
+    :param data: Uploaded file bytes.
+    :type data: bytes
+    :return: Hex digest of the bytes.
+    :rtype: str
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def extract_docx_text(digest, _data):
+    """
+    Extract the text of uploaded .docx bytes, cached by their content hash.
+
+    Only ``digest`` is used as the cache key; the bytes themselves are not hashed again
+    by Streamlit.
+
+    :param digest: Hash of the bytes computed by :func:`content_hash`.
+    :type digest: str
+    :param _data: Uploaded file bytes.
+    :type _data: bytes
+    :return: Text content of the document.
+    :rtype: str
+    """
+    return document_text(Document(io.BytesIO(_data)))
@@ -0,0 +1,336 @@
+"""
+Local stand-in for the OpenAI chat completions API.
+
+The server answers ``POST /v1/chat/completions`` with canned responses after a
+configurable latency, with or without streaming, so the workflows can be run and
+measured offline without spending API credits. Structured output requests get a JSON
+document generated from their JSON schema; prompts asking for a rating get a number;
+all other prompts get a filler text of random words of a configurable length, so
+repeated requests (e.g. for interview questions) get different answers. A fraction of requests
+can be answered with ``429 Too Many Requests`` to exercise retries.
+
+The server imitates the provider-side prompt cache: the prompt tokens of the longest
+leading run of messages already sent in an earlier request with the same model are
+reported as ``cached_tokens``, so the benchmark can check that prompts keep a stable
+prefix across turns.
+
+Point the application at the server by setting ``OPENAI_BASE_URL``::
+
+    python -m services.fake_openai --port 8765 --latency 0.5
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake streamlit run main.py
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILLER = (
+    "The candidate shows solid practical experience and a good understanding of the fundamentals. "
+    "Further practice with system design, testing and performance tuning is recommended."
+)
+
+
+def schema_example(schema, definitions=None):
+    """
+    Generate a value valid against a JSON schema, as used by structured output requests.
+
+    :param schema: JSON schema of the value.
+    :type schema: dict
+    :param definitions: Definitions referenced by ``$ref``; taken from ``schema`` when None.
+    :type definitions: dict or None
+    :return: Value matching the schema.
+    :rtype: object
+    """
+    if definitions is None:
+        definitions = schema.get("$defs", {})
+    if "$ref" in schema:
+        return schema_example(definitions[schema["$ref"].split("/")[-1]], definitions)
+    if "anyOf" in schema:
+        return schema_example(schema["anyOf"][0], definitions)
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: schema_example(field, definitions) for name, field in schema.get("properties", {}).items()}
+    if kind == "array":
+        items = schema.get("items", {})
+        values = [schema_example(items, definitions) for _ in range(max(schema.get("minItems", 0), 3))]
+        return values
+    if kind in ("integer", "number"):
+        low = schema.get("minimum", 0)
+        high = schema.get("maximum", low + 10)
+        return random.randint(int(low), int(high))
+    if kind == "boolean":
+        return True
+    if kind == "null":
+        return None
+    return filler(12)
+
+
+def filler(count):
+    """
+    Build a filler text of random words.
+
+    :param count: Number of words.
+    :type count: int
+    :return: Filler text.
+    :rtype: str
+    """
+    words = FILLER.split()
+    return " ".join(random.choice(words) for _ in range(count))
+
+
+def canned_response(body, rating=7, response_words=60):
+    """
+    Build the response text for a chat completions request.
+
+    :param body: Decoded request body.
+    :type body: dict
+    :param rating: Number returned to prompts asking for a rating.
+    :type rating: int
+    :param response_words: Number of words of the filler text.
+    :type response_words: int
+    :return: Response text.
+    :rtype: str
+    """
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        return json.dumps(schema_example(response_format["json_schema"]["schema"]))
+    prompt = " ".join(str(message.get("content", "")) for message in body.get("messages", []))
+    if "Return only a number" in prompt:
+        return str(rating)
+    return filler(response_words)
+
+
+class FakeOpenAIServer:
+    """
+    Threaded HTTP server imitating the OpenAI chat completions endpoint.
+
+    :param host: Interface to listen on.
+    :type host: str
+    :param port: Port to listen on; 0 picks a free port.
+    :type port: int
+    :param latency: Seconds before the first token of a response.
+    :type latency: float
+    :param token_interval: Seconds between two streamed tokens; also added per token to
+        non-streamed responses.
+    :type token_interval: float
+    :param error_rate: Fraction of requests answered with ``429 Too Many Requests``.
+    :type error_rate: float
+    :param rating: Number returned to prompts asking for a rating.
+    :type rating: int
+    :param response_words: Number of words of the filler text.
+    :type response_words: int
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.5, token_interval=0.01, error_rate=0.0, rating=7,
+                 response_words=60):
+        self.latency = latency
+        self.token_interval = token_interval
+        self.error_rate = error_rate
+        self.rating = rating
+        self.response_words = response_words
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self._prefixes = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        """
+        Base URL to pass as ``OPENAI_BASE_URL``.
+
+        :rtype: str
+        """
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def serve_forever(self):
+        """
+        Serve requests on the calling thread until :meth:`stop` is called.
+        """
+        self._httpd.serve_forever()
+
+    def start(self):
+        """
+        Serve requests on a background thread.
+
+        :return: The server itself.
+        :rtype: FakeOpenAIServer
+        """
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving and close the socket.
+        """
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def cached_prefix(self, model, messages):
+        """
+        Return the prompt tokens served from the imitated prompt cache and remember the
+        message prefixes of the request.
+
+        :param model: Name of the requested model.
+        :type model: str
+        :param messages: Messages of the request.
+        :type messages: list[dict]
+        :return: Prompt tokens of the longest leading run of messages seen before.
+        :rtype: int
+        """
+        cached = 0
+        with self._lock:
+            for end in range(1, len(messages) + 1):
+                key = hashlib.sha256(json.dumps([model, messages[:end]], sort_keys=True).encode("utf-8")).hexdigest()
+                if key in self._prefixes:
+                    cached = sum(len(str(message.get("content", ""))) for message in messages[:end]) // 4
+                else:
+                    self._prefixes.add(key)
+        return cached
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                if random.random() < server.error_rate:
+                    self._json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                               {"Retry-After": "0.1"})
+                    return
+                text = canned_response(body, server.rating, server.response_words)
+                tokens = [piece + " " for piece in text.split(" ")]
+                tokens[-1] = tokens[-1].rstrip(" ")
+                completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+                prompt_tokens = sum(len(str(message.get("content", ""))) for message in body.get("messages", [])) // 4
+                cached_tokens = server.cached_prefix(body.get("model"), body.get("messages", []))
+                with server._lock:
+                    server.prompt_tokens += prompt_tokens
+                    server.cached_tokens += cached_tokens
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(tokens),
+                    "total_tokens": prompt_tokens + len(tokens),
+                    "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                }
+                time.sleep(server.latency)
+                if body.get("stream"):
+                    try:
+                        self._stream(body, completion_id, tokens, usage)
+                    except (BrokenPipeError, ConnectionResetError):
+                        # The client cancelled the request
+                        self.close_connection = True
+                else:
+                    time.sleep(server.token_interval * len(tokens))
+                    self._json(200, {
+                        "id": completion_id,
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "fake"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": text},
+                            "finish_reason": "stop",
+                            "logprobs": None,
+                        }],
+                        "usage": usage,
+                    })
+
+            def _json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, body, completion_id, tokens, usage):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                def chunk(choices, **extra):
+                    payload = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": body.get("model", "fake"),
+                        "choices": choices,
+                        **extra,
+                    }
+                    self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                for index, token in enumerate(tokens):
+                    if index:
+                        time.sleep(server.token_interval)
+                    delta = {"content": token}
+                    if index == 0:
+                        delta["role"] = "assistant"
+                    chunk([{"index": 0, "delta": delta, "finish_reason": None}])
+                chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    chunk([], usage=usage)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main(argv=None):
+    """
+    Command-line entry point running the server until interrupted.
+
+    :param argv: Command-line arguments; defaults to :data:`sys.argv`.
+    :type argv: list[str] or None
+    """
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the OpenAI chat completions API.")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on")
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds before the first token")
+    parser.add_argument("--token-interval", type=float, default=0.01, help="seconds between streamed tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--rating", type=int, default=7, help="number returned to rating prompts")
+    parser.add_argument("--response-words", type=int, default=60, help="words of the filler responses")
+    args = parser.parse_args(argv)
+
+    server = FakeOpenAIServer(args.host, args.port, args.latency, args.token_interval, args.error_rate, args.rating,
+                              args.response_words)
+    print(f"Serving on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+Shared HTTP clients for the OpenAI API with rate limiting and retries.
+
+All chat model clients send their requests through one process-wide, connection-pooled
+HTTP client. Before a request is sent, it takes capacity from token buckets limiting
+the requests and tokens per minute of its model. Requests answered with ``429`` or a
+server error are retried with jittered exponential backoff. Interactive requests (the
+Technical Review turns) go first: batch requests (CV screening, question bank refills)
+wait while interactive ones are waiting and leave a reserve of the capacity to them.
+"""
+import asyncio
+import contextlib
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+import weakref
+
+import streamlit as st
+from dotenv import load_dotenv
+
+try:
+    # HTTP library of recent openai releases
+    import httpx2 as httpx
+except ImportError:
+    import httpx
+
+from services.metrics import get_metrics
+
+load_dotenv()
+# Limits per model; 0 disables the limit
+LLM_RPM = int(os.getenv("LLM_RPM", "500"))
+LLM_TPM = int(os.getenv("LLM_TPM", "30000"))
+LLM_BATCH_RESERVE = float(os.getenv("LLM_BATCH_RESERVE", "0.2"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "30"))
+# Completion tokens counted for requests that do not set max_tokens
+LLM_COMPLETION_ESTIMATE = int(os.getenv("LLM_COMPLETION_ESTIMATE", "512"))
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+RETRY_STATUSES = {408, 409, 429}
+
+_priority = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def batch_priority():
+    """
+    Send the model requests made in this context (and in the tasks it starts) as batch
+    requests, which give way to interactive ones.
+    """
+    token = _priority.set(BATCH)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously up to a per-minute capacity.
+
+    :param per_minute: Capacity and refill rate per minute.
+    :type per_minute: int
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, reserve=0.0):
+        """
+        Return the seconds until ``amount`` can be taken leaving ``reserve`` of the capacity.
+        """
+        needed = min(amount + reserve * self.capacity, self.capacity)
+        return max(needed - self.level, 0.0) / self.rate
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    Requests and tokens per minute limits of every model, shared by all threads and event loops.
+
+    :param rpm: Requests per minute per model; 0 disables the limit.
+    :type rpm: int
+    :param tpm: Tokens per minute per model; 0 disables the limit.
+    :type tpm: int
+    :param batch_reserve: Fraction of the capacity batch requests leave to interactive ones.
+    :type batch_reserve: float
+    """
+
+    def __init__(self, rpm=LLM_RPM, tpm=LLM_TPM, batch_reserve=LLM_BATCH_RESERVE):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.batch_reserve = batch_reserve
+        self._condition = threading.Condition()
+        self._buckets = {}
+        self._interactive_waiting = 0
+
+    def _try_acquire(self, model, tokens, priority):
+        """
+        Take the capacity of a request if available.
+
+        Must be called with the lock held.
+
+        :return: 0 if the capacity was taken, otherwise the seconds to wait before trying again.
+        :rtype: float
+        """
+        if model not in self._buckets:
+            self._buckets[model] = (
+                TokenBucket(self.rpm) if self.rpm else None,
+                TokenBucket(self.tpm) if self.tpm else None,
+            )
+        requests, token_bucket = self._buckets[model]
+        buckets = [(bucket, amount) for bucket, amount in ((requests, 1), (token_bucket, tokens)) if bucket]
+        if priority == BATCH and self._interactive_waiting:
+            return 0.05
+        reserve = self.batch_reserve if priority == BATCH else 0.0
+        now = time.monotonic()
+        wait = 0.0
+        for bucket, amount in buckets:
+            bucket.refill(now)
+            wait = max(wait, bucket.wait_time(amount, reserve))
+        if wait:
+            return wait
+        for bucket, amount in buckets:
+            bucket.take(amount)
+        return 0.0
+
+    @contextlib.contextmanager
+    def _waiting(self, priority):
+        with self._condition:
+            self._interactive_waiting += priority == INTERACTIVE
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._interactive_waiting -= priority == INTERACTIVE
+                self._condition.notify_all()
+
+    def acquire(self, model, tokens, priority=INTERACTIVE):
+        """
+        Block until a request of the model with the given tokens fits into the limits.
+
+        :param model: Name of the model.
+        :type model: str
+        :param tokens: Estimated prompt and completion tokens of the request.
+        :type tokens: int
+        :param priority: :data:`INTERACTIVE` or :data:`BATCH`.
+        :type priority: str
+        :return: Seconds spent waiting.
+        :rtype: float
+        """
+        start = time.monotonic()
+        with self._waiting(priority), self._condition:
+            while wait := self._try_acquire(model, tokens, priority):
+                self._condition.wait(wait)
+        return time.monotonic() - start
+
+    async def acquire_async(self, model, tokens, priority=INTERACTIVE):
+        """
+        Asynchronous variant of :meth:`acquire` that does not block the event loop.
+        """
+        start = time.monotonic()
+        with self._waiting(priority):
+            while True:
+                with self._condition:
+                    wait = self._try_acquire(model, tokens, priority)
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+        return time.monotonic() - start
+
+
+def _request_cost(request):
+    """
+    Return the model and the estimated tokens of a chat completions request.
+    """
+    try:
+        body = json.loads(request.content or b"{}")
+    except (ValueError, RuntimeError):
+        return "unknown", LLM_COMPLETION_ESTIMATE
+    prompt = sum(len(str(message.get("content", ""))) for message in body.get("messages", []))
+    completion = body.get("max_completion_tokens") or body.get("max_tokens") or LLM_COMPLETION_ESTIMATE
+    return body.get("model", "unknown"), prompt // 4 + completion
+
+
+def _retry_delay(response, attempt):
+    """
+    Return the jittered backoff before retrying, honouring the ``Retry-After`` header.
+    """
+    delay = random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+    if response is not None:
+        try:
+            if "retry-after-ms" in response.headers:
+                delay = max(delay, float(response.headers["retry-after-ms"]) / 1000)
+            elif "retry-after" in response.headers:
+                delay = max(delay, float(response.headers["retry-after"]))
+        except ValueError:
+            pass
+    return min(delay, LLM_RETRY_MAX_DELAY)
+
+
+def _should_retry(response, attempt):
+    if attempt >= LLM_MAX_RETRIES:
+        return False
+    return response is None or response.status_code in RETRY_STATUSES or response.status_code >= 500
+
+
+def _record_wait(waited):
+    if waited > 0.001:
+        get_metrics().record("throttle", _priority.get(), waited)
+
+
+def _record_retry(response):
+    get_metrics().record("retry", "connection error" if response is None else f"http {response.status_code}")
+
+
+class RateLimitedTransport(httpx.HTTPTransport):
+    """
+    Pooled HTTP transport applying the rate limits and retries to every request.
+
+    :param limiter: Shared rate limiter.
+    :type limiter: RateLimiter
+    """
+
+    def __init__(self, limiter, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter
+
+    def handle_request(self, request):
+        model, tokens = _request_cost(request)
+        attempt = 0
+        while True:
+            waited = self.limiter.acquire(model, tokens, _priority.get())
+            _record_wait(waited)
+            try:
+                response = super().handle_request(request)
+            except httpx.TransportError:
+                if not _should_retry(None, attempt):
+                    raise
+                response = None
+            if response is not None and not _should_retry(response, attempt):
+                return response
+            _record_retry(response)
+            delay = _retry_delay(response, attempt)
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Asynchronous variant of :class:`RateLimitedTransport`.
+
+    Pooled connections belong to the event loop that opened them, so a separate pool is
+    kept for every running event loop (e.g. each :func:`asyncio.run` of a batch).
+
+    :param limiter: Shared rate limiter.
+    :type limiter: RateLimiter
+    """
+
+    def __init__(self, limiter, **kwargs):
+        self.limiter = limiter
+        self._kwargs = kwargs
+        self._pools = weakref.WeakKeyDictionary()
+
+    def _pool(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._pools:
+            self._pools[loop] = httpx.AsyncHTTPTransport(**self._kwargs)
+        return self._pools[loop]
+
+    async def handle_async_request(self, request):
+        model, tokens = _request_cost(request)
+        pool = self._pool()
+        attempt = 0
+        while True:
+            waited = await self.limiter.acquire_async(model, tokens, _priority.get())
+            _record_wait(waited)
+            try:
+                response = await pool.handle_async_request(request)
+            except httpx.TransportError:
+                if not _should_retry(None, attempt):
+                    raise
+                response = None
+            if response is not None and not _should_retry(response, attempt):
+                return response
+            _record_retry(response)
+            delay = _retry_delay(response, attempt)
+            if response is not None:
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self):
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.aclose()
+
+
+@st.cache_resource(show_spinner=False)
+def get_http_clients():
+    """
+    Return the process-wide synchronous and asynchronous HTTP clients for the OpenAI API.
+
+    :return: Pair of pooled, rate-limited clients.
+    :rtype: tuple[httpx.Client, httpx.AsyncClient]
+    """
+    limiter = RateLimiter()
+    limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS // 2)
+    timeout = httpx.Timeout(600, connect=5)
+    return (
+        httpx.Client(transport=RateLimitedTransport(limiter, limits=limits), timeout=timeout),
+        httpx.AsyncClient(transport=AsyncRateLimitedTransport(limiter, limits=limits), timeout=timeout),
+    )
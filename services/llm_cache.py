@@ -0,0 +1,143 @@
+"""
+Persistent cache of language model responses.
+
+Responses are stored in a local SQLite database under a content hash of the model,
+its parameters and the prompt, so re-running an analysis on the same documents does
+not pay for the same completions again. Entries expire after a time-to-live and the
+least recently used ones are evicted when the cache grows above its size limit.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import streamlit as st
+from dotenv import load_dotenv
+
+load_dotenv()
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_responses.sqlite"))
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+def cache_key(llm, prompt, schema=None):
+    """
+    Compute the content hash identifying a model response.
+
+    :param llm: Chat model client; its model name and parameters are part of the key.
+    :type llm: BaseChatModel
+    :param prompt: Prompt sent to the model, a text or chat messages.
+    :type prompt: str or list[BaseMessage]
+    :param schema: Pydantic model of a structured response, if any.
+    :type schema: type[pydantic.BaseModel] or None
+    :return: Hex digest of the (model, parameters, prompt) triple.
+    :rtype: str
+    """
+    params = {key: str(value) for key, value in llm._identifying_params.items()}
+    if not isinstance(prompt, str):
+        prompt = [[message.type, message.content] for message in prompt]
+    payload = {"llm": type(llm).__name__, "params": params, "prompt": prompt}
+    if schema is not None:
+        payload["schema"] = schema.model_json_schema()
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed LRU cache of response texts with a time-to-live.
+
+    The cache is shared by all sessions and graph worker threads, so access to the
+    connection is serialized with a lock.
+
+    :param path: Path of the SQLite database file.
+    :type path: str
+    :param max_entries: Maximum number of stored responses.
+    :type max_entries: int
+    :param ttl: Time in seconds after which a response expires.
+    :type ttl: float
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, content TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._connection.commit()
+
+    def lookup(self, key):
+        """
+        Return the cached response for a key and mark it as recently used.
+
+        :param key: Key computed by :func:`cache_key`.
+        :type key: str
+        :return: Cached response text, or None on a miss or an expired entry.
+        :rtype: str or None
+        """
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content FROM responses WHERE key = ? AND created >= ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._connection.commit()
+            self.hits += 1
+            return row[0]
+
+    def store(self, key, content):
+        """
+        Store a response and evict expired and least recently used entries.
+
+        :param key: Key computed by :func:`cache_key`.
+        :type key: str
+        :param content: Response text.
+        :type content: str
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, content, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, content, now, now),
+            )
+            self._connection.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            self._connection.execute(
+                "DELETE FROM responses WHERE key NOT IN "
+                "(SELECT key FROM responses ORDER BY accessed DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._connection.commit()
+
+    def stats(self):
+        """
+        Return the hit and miss counters of this process and the number of stored entries.
+
+        :return: Dictionary with ``hits``, ``misses`` and ``entries``.
+        :rtype: dict
+        """
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    """
+    Return the process-wide response cache.
+
+    :return: Shared response cache.
+    :rtype: ResponseCache
+    """
+    return ResponseCache()
@@ -0,0 +1,304 @@
+"""
+Shared language model clients used by the Streamlit pages.
+
+Clients are created once per model for the whole server process and reused
+across script reruns and user sessions instead of being rebuilt on every
+interaction.
+
+Every model call is a named task (usually the graph node making it). Short tasks whose
+answers are easy to validate, such as rating an answer or extracting scores, are routed
+to a small, fast model; the others use the large model. When the answer of the small
+model does not parse, the task is repeated with the large model.
+"""
+import os
+
+import streamlit as st
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+from services.http_client import get_http_clients
+from services.llm_cache import cache_key, get_response_cache
+from services.metrics import get_metrics
+from services.metrics_callback import get_metrics_callback
+
+DEFAULT_MODEL = "gpt-4o"
+
+load_dotenv()
+# Render responses token by token; set LLM_STREAMING=0 in .env to wait for whole completions
+STREAMING = os.getenv("LLM_STREAMING", "1") != "0"
+SMALL_MODEL = os.getenv("LLM_SMALL_MODEL", "gpt-4o-mini")
+
+
+def _parse_routes(value):
+    """
+    Parse a ``task=model,task=model`` list of model routes.
+    """
+    routes = {}
+    for route in value.split(","):
+        task, _, model = route.partition("=")
+        if task.strip() and model.strip():
+            routes[task.strip()] = model.strip()
+    return routes
+
+
+# Tasks answered by the small model; tasks not listed use the large model of the caller.
+# Override or extend in .env, e.g. LLM_MODEL_ROUTES=rating_node=gpt-4o,checking_node=gpt-4o-mini
+MODEL_ROUTES = {
+    "rating_node": SMALL_MODEL,
+    "analise_cv_node": SMALL_MODEL,
+    "analise_requirements_node": SMALL_MODEL,
+    "greeting": SMALL_MODEL,
+    "summary_reduce": SMALL_MODEL,
+}
+MODEL_ROUTES.update(_parse_routes(os.getenv("LLM_MODEL_ROUTES", "")))
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def get_llm(model=DEFAULT_MODEL):
+    """
+    Return the process-wide chat model client for the given model name.
+
+    Calls of the client are measured by :func:`services.metrics_callback.get_metrics_callback`;
+    token usage is requested for streamed responses too. Requests go through the shared
+    pooled HTTP clients of :mod:`services.http_client`, which apply the rate limits and
+    retries, so the retries of the OpenAI SDK are disabled.
+
+    :param model: Name of the OpenAI chat model.
+    :type model: str
+    :return: Shared chat model client.
+    :rtype: ChatOpenAI
+    :raises ValueError: If the OPENAI_API_KEY is not set in the environment.
+    """
+    if not os.getenv("OPENAI_API_KEY"):
+        raise ValueError("OPENAI_API_KEY is not set in the .env file")
+    http_client, http_async_client = get_http_clients()
+    return ChatOpenAI(
+        model=model,
+        stream_usage=True,
+        max_retries=0,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        callbacks=[get_metrics_callback()],
+    )
+
+
+def route_model(task, model=DEFAULT_MODEL):
+    """
+    Return the name of the model answering a task.
+
+    :param task: Name of the task, e.g. the graph node making the call.
+    :type task: str
+    :param model: Large model used for tasks without a route.
+    :type model: str
+    :return: Name of the chat model.
+    :rtype: str
+    """
+    return MODEL_ROUTES.get(task, model)
+
+
+def count_tokens(llm, text):
+    """
+    Count the tokens of a text with the tokenizer of the given model.
+
+    :param llm: Chat model client.
+    :type llm: ChatOpenAI
+    :param text: Text to count.
+    :type text: str
+    :return: Number of tokens.
+    :rtype: int
+    """
+    try:
+        return llm.get_num_tokens(text)
+    except Exception:
+        # The tokenizer files may be unavailable (e.g. offline); use the usual estimate
+        return len(text) // 4
+
+
+def _lookup(key):
+    """
+    Look up a response in the cache and record the hit or miss.
+    """
+    content = get_response_cache().lookup(key)
+    get_metrics().record_cache(content is not None)
+    return content
+
+
+def cached_invoke(llm, prompt, cache=True):
+    """
+    Invoke the model and return the response text, using the persistent response cache.
+
+    :param llm: Chat model client.
+    :type llm: ChatOpenAI
+    :param prompt: Prompt sent to the model.
+    :type prompt: str or list[BaseMessage]
+    :param cache: Whether to look up and store the response in the cache. Pass False for
+        calls that must stay non-deterministic.
+    :type cache: bool
+    :return: Response text.
+    :rtype: str
+    """
+    if not cache:
+        return llm.invoke(prompt).content
+    key = cache_key(llm, prompt)
+    content = _lookup(key)
+    if content is None:
+        content = llm.invoke(prompt).content
+        get_response_cache().store(key, content)
+    return content
+
+
+async def cached_ainvoke(llm, prompt, cache=True):
+    """
+    Asynchronous variant of :func:`cached_invoke`.
+
+    :param llm: Chat model client.
+    :type llm: ChatOpenAI
+    :param prompt: Prompt sent to the model.
+    :type prompt: str or list[BaseMessage]
+    :param cache: Whether to look up and store the response in the cache.
+    :type cache: bool
+    :return: Response text.
+    :rtype: str
+    """
+    if not cache:
+        return (await llm.ainvoke(prompt)).content
+    key = cache_key(llm, prompt)
+    content = _lookup(key)
+    if content is None:
+        content = (await llm.ainvoke(prompt)).content
+        get_response_cache().store(key, content)
+    return content
+
+
+def cached_structured_invoke(llm, prompt, schema, cache=True):
+    """
+    Invoke the model with a schema-validated structured output, using the response cache.
+
+    Cached responses are stored as JSON and validated against the schema again when read.
+
+    :param llm: Chat model client.
+    :type llm: ChatOpenAI
+    :param prompt: Prompt sent to the model.
+    :type prompt: str or list[BaseMessage]
+    :param schema: Pydantic model describing the response.
+    :type schema: type[pydantic.BaseModel]
+    :param cache: Whether to look up and store the response in the cache.
+    :type cache: bool
+    :return: Validated response.
+    :rtype: pydantic.BaseModel
+    """
+    structured_llm = llm.with_structured_output(schema)
+    if not cache:
+        return structured_llm.invoke(prompt)
+    key = cache_key(llm, prompt, schema)
+    content = _lookup(key)
+    if content is not None:
+        return schema.model_validate_json(content)
+    result = structured_llm.invoke(prompt)
+    get_response_cache().store(key, result.model_dump_json())
+    return result
+
+
+async def cached_structured_ainvoke(llm, prompt, schema, cache=True):
+    """
+    Asynchronous variant of :func:`cached_structured_invoke`.
+
+    :param llm: Chat model client.
+    :type llm: ChatOpenAI
+    :param prompt: Prompt sent to the model.
+    :type prompt: str or list[BaseMessage]
+    :param schema: Pydantic model describing the response.
+    :type schema: type[pydantic.BaseModel]
+    :param cache: Whether to look up and store the response in the cache.
+    :type cache: bool
+    :return: Validated response.
+    :rtype: pydantic.BaseModel
+    """
+    structured_llm = llm.with_structured_output(schema)
+    if not cache:
+        return await structured_llm.ainvoke(prompt)
+    key = cache_key(llm, prompt, schema)
+    content = _lookup(key)
+    if content is not None:
+        return schema.model_validate_json(content)
+    result = await structured_llm.ainvoke(prompt)
+    get_response_cache().store(key, result.model_dump_json())
+    return result
+
+
+async def routed_ainvoke(task, prompt, model=DEFAULT_MODEL, schema=None, validate=None):
+    """
+    Answer a task with its routed model, falling back to the large model when the answer
+    does not parse.
+
+    The answer of a structured task is invalid when it does not match the schema; the
+    answer of a text task when ``validate`` rejects it. Fallbacks are recorded in the
+    metrics, as errors when the response could not be parsed at all. Responses are cached per model, like in :func:`cached_ainvoke`.
+
+    :param task: Name of the task, see :func:`route_model`.
+    :type task: str
+    :param prompt: Prompt sent to the model.
+    :type prompt: str or list[BaseMessage]
+    :param model: Large model used for tasks without a route and as the fallback.
+    :type model: str
+    :param schema: Pydantic model describing a structured response.
+    :type schema: type[pydantic.BaseModel] or None
+    :param validate: Check of a text response returning whether it is valid.
+    :type validate: Callable[[str], bool] or None
+    :return: Validated structured response, or the response text. The text of the large
+        model is returned even if it does not pass ``validate``.
+    :rtype: pydantic.BaseModel or str
+    """
+    routed = route_model(task, model)
+    if routed != model:
+        invalid = False
+        try:
+            if schema is not None:
+                return await cached_structured_ainvoke(get_llm(routed), prompt, schema)
+            content = await cached_ainvoke(get_llm(routed), prompt)
+            if validate is None or validate(content):
+                return content
+        except ValueError:
+            # Schema validation and output parsing errors
+            invalid = True
+        get_metrics().record("fallback", task, error=invalid)
+    if schema is not None:
+        return await cached_structured_ainvoke(get_llm(model), prompt, schema)
+    return await cached_ainvoke(get_llm(model), prompt)
+
+
+def chat_response(llm, prompt, stream=None, cache=True):
+    """
+    Display the model response to a prompt in an assistant chat message.
+
+    In streaming mode the tokens are rendered as they arrive, so the user sees the
+    beginning of the answer after the first token instead of after the whole completion.
+    Cached responses are rendered at once without calling the model.
+
+    :param llm: Chat model client.
+    :type llm: ChatOpenAI
+    :param prompt: Prompt sent to the model.
+    :type prompt: str or list[BaseMessage]
+    :param stream: Whether to stream the response; defaults to :data:`STREAMING`.
+    :type stream: bool or None
+    :param cache: Whether to use the persistent response cache. Pass False for calls that
+        must stay non-deterministic.
+    :type cache: bool
+    :return: Full text of the response.
+    :rtype: str
+    """
+    if stream is None:
+        stream = STREAMING
+    key = cache_key(llm, prompt) if cache else None
+    content = _lookup(key) if key else None
+    with st.chat_message("assistant"):
+        if content is not None:
+            st.markdown(content)
+            return content
+        if stream:
+            content = st.write_stream(chunk.content for chunk in llm.stream(prompt))
+        else:
+            content = llm.invoke(prompt).content
+            st.markdown(content)
+    if key:
+        get_response_cache().store(key, content)
+    return content
@@ -0,0 +1,187 @@
+"""
+Matching of candidates and job requirements by their score vectors.
+
+Every analyzed CV and requirements document is stored as a profile: a name and the
+vector of its scores ordered as :data:`services.cv_workflow.SCORE_CATEGORIES`. All
+stored candidates can be ranked against a requirements profile, or all stored
+requirements against a candidate, with one NumPy matrix operation over the stored
+vectors, without calling the language model again.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import streamlit as st
+from dotenv import load_dotenv
+
+load_dotenv()
+MATCH_STORE_PATH = os.getenv("MATCH_STORE_PATH", os.path.join(".cache", "profiles.sqlite"))
+# Weights of the score categories in the match, ordered as SCORE_CATEGORIES
+MATCH_WEIGHTS = [float(weight) for weight in os.getenv("MATCH_WEIGHTS", "1,1,1").split(",")]
+
+CV = "cv"
+REQUIREMENTS = "requirements"
+
+
+def match_matrix(cv_scores, requirements_scores, weights=None):
+    """
+    Compute the match percentage of every candidate with every set of requirements.
+
+    Each category contributes the candidate score divided by the required score, capped
+    at 1, so exceeding the requirements in one category does not hide gaps in another.
+    The contributions are averaged with the category weights.
+
+    :param cv_scores: Candidate score vectors, one row per candidate.
+    :type cv_scores: array_like
+    :param requirements_scores: Required score vectors, one row per requirements profile.
+    :type requirements_scores: array_like
+    :param weights: Weights of the categories; equal weights when None.
+    :type weights: array_like or None
+    :return: Match percentages in the range 0-100, candidates by requirements.
+    :rtype: numpy.ndarray
+    """
+    cv = np.asarray(cv_scores, dtype=float)[:, None, :]
+    required = np.asarray(requirements_scores, dtype=float)[None, :, :]
+    weights = np.ones(cv.shape[-1]) if weights is None else np.asarray(weights, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = np.where(required > 0, np.minimum(cv / required, 1.0), 1.0)
+    return np.round(100 * (ratios @ weights) / weights.sum(), 1)
+
+
+def profile_digest(text):
+    """
+    Compute the hash identifying the document of a profile.
+
+    :param text: Text content of the CV or requirements.
+    :type text: str
+    :return: Hex digest of the text.
+    :rtype: str
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def document_name(text, max_length=80):
+    """
+    Name a profile after the first line of its document, e.g. the name of the candidate.
+
+    :param text: Text content of the CV or requirements.
+    :type text: str
+    :param max_length: Maximum length of the name.
+    :type max_length: int
+    :return: First non-empty line, shortened to ``max_length`` characters.
+    :rtype: str
+    """
+    line = next((line.strip() for line in text.splitlines() if line.strip()), "Untitled")
+    return line if len(line) <= max_length else line[:max_length - 3] + "..."
+
+
+class ProfileStore:
+    """
+    SQLite store of candidate and requirements profiles with their score matrices
+    kept in memory.
+
+    The store is shared by all sessions and graph tasks, so access to the connection
+    is serialized with a lock. A document analyzed again replaces its profile.
+
+    :param path: Path of the SQLite database file.
+    :type path: str
+    """
+
+    def __init__(self, path=MATCH_STORE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._matrices = {}
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            "kind TEXT NOT NULL, digest TEXT NOT NULL, name TEXT NOT NULL, scores TEXT NOT NULL, "
+            "updated REAL NOT NULL, PRIMARY KEY (kind, digest))"
+        )
+        self._connection.commit()
+
+    def add(self, kind, name, text, scores):
+        """
+        Store the profile of an analyzed document.
+
+        :param kind: :data:`CV` or :data:`REQUIREMENTS`.
+        :type kind: str
+        :param name: Name shown in the rankings, e.g. the file name.
+        :type name: str
+        :param text: Text content of the document, identifying the profile.
+        :type text: str
+        :param scores: Scores ordered as :data:`services.cv_workflow.SCORE_CATEGORIES`.
+        :type scores: list[int]
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?)",
+                (kind, profile_digest(text), name, ",".join(str(score) for score in scores), time.time()),
+            )
+            self._connection.commit()
+            self._matrices.pop(kind, None)
+
+    def profiles(self, kind):
+        """
+        Return the names and the score matrix of the stored profiles of a kind.
+
+        The matrix is read from the database once and kept until a profile is added.
+
+        :param kind: :data:`CV` or :data:`REQUIREMENTS`.
+        :type kind: str
+        :return: Names of the profiles and their scores, one row per profile.
+        :rtype: tuple[list[str], numpy.ndarray]
+        """
+        with self._lock:
+            if kind not in self._matrices:
+                rows = self._connection.execute(
+                    "SELECT name, scores FROM profiles WHERE kind = ? ORDER BY updated", (kind,)
+                ).fetchall()
+                names = [name for name, _ in rows]
+                matrix = np.array([[float(score) for score in scores.split(",")] for _, scores in rows], dtype=float)
+                # One column per score category, also when no profile is stored yet
+                self._matrices[kind] = names, matrix.reshape(len(rows), len(MATCH_WEIGHTS))
+            return self._matrices[kind]
+
+    def rank(self, scores, against=CV, weights=None, limit=None):
+        """
+        Rank the stored profiles of a kind against one score vector.
+
+        With ``against=CV`` the stored candidates are ranked against requirements
+        ``scores``; with ``against=REQUIREMENTS`` the stored requirements are ranked
+        against candidate ``scores``.
+
+        :param scores: Score vector of the requirements or of the candidate.
+        :type scores: list[int]
+        :param against: Kind of the ranked profiles.
+        :type against: str
+        :param weights: Weights of the categories; see :func:`match_matrix`.
+        :type weights: list[float] or None
+        :param limit: Maximum number of returned profiles.
+        :type limit: int or None
+        :return: Name, match percentage and scores of the profiles, best match first.
+        :rtype: list[tuple[str, float, list[float]]]
+        """
+        names, matrix = self.profiles(against)
+        if not names:
+            return []
+        if against == CV:
+            matches = match_matrix(matrix, [scores], weights)[:, 0]
+        else:
+            matches = match_matrix([scores], matrix, weights)[0]
+        order = np.argsort(-matches, kind="stable")[:limit]
+        return [(names[index], float(matches[index]), matrix[index].tolist()) for index in order]
+
+
+@st.cache_resource(show_spinner=False)
+def get_profile_store():
+    """
+    Return the process-wide profile store.
+
+    :return: Shared profile store.
+    :rtype: ProfileStore
+    """
+    return ProfileStore()
@@ -0,0 +1,265 @@
+"""
+Instrumentation of workflow graph nodes and language model calls.
+
+A callback handler (see :mod:`services.metrics_callback`) attached to the chat model
+clients and to the graph runs measures the wall time of every graph node and model
+call, the prompt and completion tokens, the estimated cost, errors and retries. Response cache hits and misses are recorded by
+:mod:`services.llm_client`. Measurements are aggregated for the whole process and for
+each Streamlit session, shown in the diagnostics panel of the sidebar and written
+periodically to a JSON metrics file that other tools can read.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+import streamlit as st
+from dotenv import load_dotenv
+
+from services.llm_cache import get_response_cache
+
+load_dotenv()
+METRICS_PATH = os.getenv("METRICS_PATH", os.path.join(".cache", "metrics.json"))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+METRICS_MAX_SESSIONS = int(os.getenv("METRICS_MAX_SESSIONS", "100"))
+# Number of latest durations kept per measured operation for the percentiles
+LATENCY_SAMPLES = 500
+# USD per million prompt and completion tokens
+MODEL_PRICES = {
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+}
+
+# Session the measurements of the current script run (and the graph tasks it starts) belong to
+_session = contextvars.ContextVar("metrics_session", default=None)
+
+
+def bind_session():
+    """
+    Attribute the measurements of the current script run to the current Streamlit session.
+
+    Graph nodes and model calls started from the script run inherit the session.
+    """
+    if "metrics_session" not in st.session_state:
+        st.session_state.metrics_session = uuid.uuid4().hex
+    _session.set(st.session_state.metrics_session)
+
+
+def current_session():
+    """
+    Return the session the measurements of the current context are attributed to.
+
+    :return: Identifier of the Streamlit session, or None outside a bound script run.
+    :rtype: str or None
+    """
+    return _session.get()
+
+
+def model_cost(model, prompt_tokens, completion_tokens):
+    """
+    Estimate the cost of a model call from its token usage.
+
+    :param model: Name of the chat model.
+    :type model: str
+    :param prompt_tokens: Number of prompt tokens.
+    :type prompt_tokens: int
+    :param completion_tokens: Number of completion tokens.
+    :type completion_tokens: int
+    :return: Cost in USD, 0 for models without a known price.
+    :rtype: float
+    """
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class _Stat:
+    """
+    Aggregated measurements of one operation.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+
+    def add(self, duration, prompt_tokens, completion_tokens, cost, error):
+        self.count += 1
+        self.errors += int(error)
+        self.total_time += duration
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost += cost
+        self.samples.append(duration)
+
+    def summary(self):
+        samples = sorted(self.samples)
+
+        def percentile(q):
+            return 1000 * samples[min(int(q * len(samples)), len(samples) - 1)] if samples else 0.0
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_s": round(self.total_time, 3),
+            "p50_ms": round(percentile(0.5), 1),
+            "p95_ms": round(percentile(0.95), 1),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost, 6),
+        }
+
+
+class Metrics:
+    """
+    Thread-safe registry of measurements aggregated per process and per session.
+
+    :param path: Path of the JSON metrics file.
+    :type path: str
+    :param flush_interval: Minimum time in seconds between two writes of the metrics file.
+    :type flush_interval: float
+    :param max_sessions: Number of most recently active sessions kept.
+    :type max_sessions: int
+    """
+
+    def __init__(self, path=METRICS_PATH, flush_interval=METRICS_FLUSH_INTERVAL, max_sessions=METRICS_MAX_SESSIONS):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_sessions = max_sessions
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._process = {}
+        self._sessions = OrderedDict()
+        self._last_flush = 0.0
+
+    def record(self, kind, name, duration=0.0, prompt_tokens=0, completion_tokens=0, cost=0.0, error=False,
+               session=None):
+        """
+        Record one measured operation.
+
+        :param kind: Kind of operation: ``node``, ``llm``, ``cache``, ``retry``, ``throttle``,
+            ``fallback``, ``duplicate``, ``speculation`` or ``import``.
+        :type kind: str
+        :param name: Name of the graph node, model, cache outcome, retry reason, priority, task
+            falling back to the large model, source of a rejected duplicate question, outcome of
+            a speculative question or imported module.
+        :type name: str
+        :param duration: Wall time in seconds.
+        :type duration: float
+        :param prompt_tokens: Number of prompt tokens.
+        :type prompt_tokens: int
+        :param completion_tokens: Number of completion tokens.
+        :type completion_tokens: int
+        :param cost: Estimated cost in USD.
+        :type cost: float
+        :param error: Whether the operation failed.
+        :type error: bool
+        :param session: Session of the operation; defaults to the session bound to the current context.
+        :type session: str or None
+        """
+        session = session or _session.get()
+        key = (kind, name)
+        with self._lock:
+            scopes = [self._process]
+            if session is not None:
+                if session not in self._sessions:
+                    self._sessions[session] = {}
+                    if len(self._sessions) > self.max_sessions:
+                        self._sessions.popitem(last=False)
+                self._sessions.move_to_end(session)
+                scopes.append(self._sessions[session])
+            for stats in scopes:
+                stats.setdefault(key, _Stat()).add(duration, prompt_tokens, completion_tokens, cost, error)
+        if time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def record_cache(self, hit):
+        """
+        Record a lookup in the response cache.
+
+        :param hit: Whether the response was found in the cache.
+        :type hit: bool
+        """
+        self.record("cache", "hit" if hit else "miss")
+
+    def rows(self, session=None):
+        """
+        Return the aggregated measurements of the process or of one session.
+
+        :param session: Session identifier, or None for the whole process.
+        :type session: str or None
+        :return: One dictionary per operation with its kind, name and aggregates.
+        :rtype: list[dict]
+        """
+        with self._lock:
+            stats = self._process if session is None else self._sessions.get(session, {})
+            return [{"kind": kind, "name": name, **stat.summary()} for (kind, name), stat in sorted(stats.items())]
+
+    def snapshot(self):
+        """
+        Return all measurements as a JSON-serializable dictionary.
+
+        :return: Process and per-session measurements and response cache statistics.
+        :rtype: dict
+        """
+        with self._lock:
+            sessions = list(self._sessions)
+        return {
+            "timestamp": time.time(),
+            "uptime_s": round(time.time() - self.started, 1),
+            "process": self.rows(),
+            "sessions": {session: self.rows(session) for session in sessions},
+            "response_cache": get_response_cache().stats(),
+        }
+
+    def flush(self):
+        """
+        Write the snapshot to the metrics file, replacing it atomically.
+        """
+        self._last_flush = time.time()
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump(self.snapshot(), file, indent=1)
+            os.replace(temporary, self.path)
+        except OSError as e:
+            print(f"Cannot write metrics: {e}")
+
+
+@st.cache_resource(show_spinner=False)
+def get_metrics():
+    """
+    Return the process-wide metrics registry.
+
+    :return: Shared metrics registry.
+    :rtype: Metrics
+    """
+    return Metrics()
+
+
+def show_diagnostics():
+    """
+    Display the measurements of the current session and of the process in the sidebar.
+    """
+    # Imported here, so loading the metrics on the Home page does not import pandas
+    import pandas as pd
+
+    metrics = get_metrics()
+    with st.sidebar.expander("Diagnostics"):
+        for label, rows in (("This session", metrics.rows(_session.get() or "")), ("Process", metrics.rows())):
+            st.caption(label)
+            if rows:
+                st.dataframe(pd.DataFrame(rows).set_index(["kind", "name"]))
+            else:
+                st.text("No measurements yet")
+        stats = get_response_cache().stats()
+        st.caption(f"Response cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+        st.caption(f"Metrics file: {metrics.path}")
@@ -0,0 +1,85 @@
+"""
+LangChain callback handler feeding :mod:`services.metrics`.
+
+Kept apart from the metrics registry, so the entry point can show the diagnostics panel
+without importing LangChain; only the workflows that run chat models and graphs load
+this module.
+"""
+import time
+
+import streamlit as st
+from langchain_core.callbacks import BaseCallbackHandler
+
+from services.metrics import current_session, get_metrics, model_cost
+
+
+class MetricsCallback(BaseCallbackHandler):
+    """
+    LangChain callback handler measuring graph nodes and chat model calls.
+
+    :param metrics: Registry receiving the measurements.
+    :type metrics: Metrics
+    """
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self._runs = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # Only the run of the node itself, not the runnables nested in it
+        if node is not None and kwargs.get("name") == node:
+            self._runs[run_id] = ("node", node, time.perf_counter(), current_session())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=True)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        model = (metadata or {}).get("ls_model_name") or "unknown"
+        self._runs[run_id] = ("llm", model, time.perf_counter(), current_session())
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self.on_chat_model_start(serialized, prompts, run_id=run_id, metadata=metadata, **kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt_tokens = completion_tokens = 0
+        message = getattr(response.generations[0][0], "message", None) if response.generations else None
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            prompt_tokens, completion_tokens = usage["input_tokens"], usage["output_tokens"]
+        elif response.llm_output and response.llm_output.get("token_usage"):
+            token_usage = response.llm_output["token_usage"]
+            prompt_tokens = token_usage.get("prompt_tokens", 0)
+            completion_tokens = token_usage.get("completion_tokens", 0)
+        self._finish(run_id, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=True)
+
+    def on_retry(self, retry_state, *, run_id, **kwargs):
+        self.metrics.record("retry", kwargs.get("name") or "llm")
+
+    def _finish(self, run_id, prompt_tokens=0, completion_tokens=0, error=False):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        kind, name, start, session = run
+        cost = model_cost(name, prompt_tokens, completion_tokens) if kind == "llm" else 0.0
+        self.metrics.record(kind, name, time.perf_counter() - start, prompt_tokens, completion_tokens, cost, error,
+                            session=session)
+
+
+@st.cache_resource(show_spinner=False)
+def get_metrics_callback():
+    """
+    Return the process-wide callback handler recording into :func:`get_metrics`.
+
+    Pass it in the ``callbacks`` of a graph run configuration to measure its nodes.
+
+    :return: Shared callback handler.
+    :rtype: MetricsCallback
+    """
+    return MetricsCallback(get_metrics())
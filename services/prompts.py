@@ -0,0 +1,167 @@
+"""
+Registry of the prompt templates of both workflows.
+
+Prompts are chat message lists laid out from the most to the least stable part, so
+consecutive requests share the longest possible prefix and the provider-side prompt
+cache can serve it instead of processing it again:
+
+1. a static system message, identical for every task of a workflow;
+2. the session context (selected technologies and job level), identical for every turn
+   of a Technical Review session;
+3. the variable tail: the fixed task instruction followed by the question, answer or
+   document it applies to.
+
+Values are only ever placed in the message they belong to, never spliced into the
+middle of a static text. Templates are compiled once at import and filled with
+:func:`build_prompt`.
+"""
+from langchain_core.prompts import ChatPromptTemplate
+
+RECRUITER_SYSTEM = (
+    "You are a professional recruiter and an experienced software developer conducting technical interviews. "
+    "Follow the task given in the last message exactly and do not add explanations it does not ask for."
+)
+SESSION_CONTEXT = (
+    "You are hiring developers for roles involving {programming_languages}. "
+    "The candidates are being recruited for positions at the {job_level} level."
+)
+CV_SYSTEM = (
+    "You are a professional recruiter assessing CVs and job requirements in terms of technical skills, "
+    "soft skills, languages and professional experience."
+)
+
+_TEMPLATES = {
+    "greeting": [
+        ("system", RECRUITER_SYSTEM),
+        ("human", "Write a hi and tell that you are assistant to help in recruitment process"),
+    ],
+    "question": [
+        ("system", RECRUITER_SYSTEM),
+        ("system", SESSION_CONTEXT),
+        ("human",
+         "Your sole task is to ask a professional and relevant interview question appropriate for this role. "
+         "Do not provide any explanations, feedback, or additional commentary—focus exclusively on formulating "
+         "the question. One question should be specific for one language. Ask only one question. "
+         "The bigger priority is to ask questions for all of the technologies; you can take the conclusions "
+         "below into account but you don't need to.\n"
+         "Conclusions: {conclusions}"),
+    ],
+    "questions": [
+        ("system", RECRUITER_SYSTEM),
+        ("system", SESSION_CONTEXT),
+        ("human",
+         "Your sole task is to ask professional and relevant interview questions appropriate for this role. "
+         "Do not provide any explanations, feedback, or additional commentary—focus exclusively on formulating "
+         "the questions. Each question should be specific for one language and all of the technologies should "
+         "be covered.\n"
+         "Number of questions: {count}"),
+    ],
+    "rating": [
+        ("system", RECRUITER_SYSTEM),
+        ("system", SESSION_CONTEXT),
+        ("human",
+         "Rate the answer to the question below on a scale of 1-10. Return only a number, nothing else.\n"
+         "Question: {question}\n"
+         "Answer: {answer}"),
+    ],
+    "model_answer": [
+        ("system", RECRUITER_SYSTEM),
+        ("system", SESSION_CONTEXT),
+        ("human",
+         "Write a model answer for the question below. The answer shouldn't be long. "
+         "Focus on the most important information.\n"
+         "Question: {question}"),
+    ],
+    "congratulation": [
+        ("system", RECRUITER_SYSTEM),
+        ("system", SESSION_CONTEXT),
+        ("human",
+         "Evaluate the answer to the question below. If the answer is good, congratulate the candidate and return "
+         "a concise list of the key strengths or positive aspects of the answer.\n"
+         "Question: {question}\n"
+         "Answer: {answer}"),
+    ],
+    "weak_areas": [
+        ("system", RECRUITER_SYSTEM),
+        ("system", SESSION_CONTEXT),
+        ("human",
+         "Below is the current list of areas where the user struggles the most, followed by the newest question, "
+         "the user's answer and its rating. Update the list with what the newest answer shows: add new weak "
+         "areas, drop areas the user has now mastered and keep the rest. Return only a short list of things "
+         "worth revising, at most {token_budget} tokens long.\n"
+         "Current list: {weak_areas}\n"
+         "Question: {question}\n"
+         "Answer: {answer}\n"
+         "Rating: {rating}"),
+    ],
+    "cv_analysis": [
+        ("system", CV_SYSTEM),
+        ("human",
+         "Analyze the CV below. Write a detailed summary of the candidate's skills. Additionally, assess the "
+         "user's skills on a scale of 1-10 based on:\n"
+         "- Experience\n"
+         "- Technical abilities\n"
+         "- Language proficiency\n\n"
+         "CV:\n{cv_text}"),
+    ],
+    "cv_section": [
+        ("system", CV_SYSTEM),
+        ("human",
+         "Analyze the CV section below. Write a short summary of the skills and experience it shows. "
+         "Additionally, assess what the section shows on a scale of 1-10 for:\n"
+         "- Experience\n"
+         "- Technical abilities\n"
+         "- Language proficiency\n"
+         "Use null for an aspect the section tells nothing about.\n\n"
+         "Section: {section}\n{text}"),
+    ],
+    "requirements_analysis": [
+        ("system", CV_SYSTEM),
+        ("human",
+         "Analyze the job requirements below. Write a detailed summary of the requirements. Additionally, "
+         "evaluate the level the requirements expect on a scale of 1-10 based on:\n"
+         "- Experience\n"
+         "- Technical skills\n"
+         "- Language proficiency\n\n"
+         "Job requirements:\n{requirements_text}"),
+    ],
+    "summary_reduce": [
+        ("system", CV_SYSTEM),
+        ("human",
+         "The summaries below describe consecutive parts of one document. Combine them into one detailed "
+         "summary of the whole document, keeping every relevant fact once.\n\n"
+         "Document: {document}\n{summaries}"),
+    ],
+    "model_cv": [
+        ("system", CV_SYSTEM),
+        ("human",
+         "Create a professional model CV tailored to the requirements analysis and the CV below. Ensure the CV "
+         "follows an industry-standard format with the following sections:\n"
+         "- Contact Information\n"
+         "- Professional Summary\n"
+         "- Skills (highlight technical and soft skills)\n"
+         "- Work Experience (list positions chronologically with relevant responsibilities)\n"
+         "- Education\n"
+         "- Additional Information (e.g., certifications, languages, or achievements)\n\n"
+         "The CV should be written in a clear, concise, and professional style.\n\n"
+         "Requirements analysis:\n{requirements_analysis}\n\n"
+         "CV:\n{cv_text}"),
+    ],
+}
+
+# Compiled once for the whole process
+PROMPTS = {name: ChatPromptTemplate.from_messages(messages) for name, messages in _TEMPLATES.items()}
+
+
+def build_prompt(name, **values):
+    """
+    Fill a registered prompt template.
+
+    :param name: Name of the template in :data:`PROMPTS`.
+    :type name: str
+    :param values: Values of the template variables.
+    :return: Chat messages, static parts first.
+    :rtype: list[langchain_core.messages.BaseMessage]
+    :raises KeyError: If the template or one of its variables is missing.
+    """
+    return PROMPTS[name].format_messages(**values)
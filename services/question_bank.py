@@ -0,0 +1,183 @@
+"""
+Local bank of pre-generated interview questions.
+
+Questions are generated in the background for each combination of selected
+technologies and job level and stored in a local SQLite database, so a Technical
+Review turn can serve the next question with a local lookup instead of waiting for
+the language model. The bank tracks which questions every session has already seen
+and is refilled whenever the unseen stock of a session falls below a low-water mark.
+"""
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+
+from services.http_client import batch_priority
+from services.llm_client import DEFAULT_MODEL, get_llm
+from services.prompts import build_prompt
+
+load_dotenv()
+QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH", os.path.join(".cache", "question_bank.sqlite"))
+QUESTION_BANK_LOW_WATER = int(os.getenv("QUESTION_BANK_LOW_WATER", "5"))
+QUESTION_BANK_REFILL = int(os.getenv("QUESTION_BANK_REFILL", "10"))
+QUESTION_BANK_MAX = int(os.getenv("QUESTION_BANK_MAX", "200"))
+
+
+class QuestionList(BaseModel):
+    """
+    Structured response with a batch of generated interview questions.
+    """
+    questions: list[str] = Field(description="Distinct interview questions, one question per item")
+
+
+def questions_prompt(programming_languages, job_level, count):
+    """
+    Build the prompt generating a batch of interview questions.
+
+    :param programming_languages: Selected programming technologies.
+    :type programming_languages: str
+    :param job_level: Selected job level.
+    :type job_level: str
+    :param count: Number of questions to generate.
+    :type count: int
+    :return: Prompt messages for the language model.
+    :rtype: list[BaseMessage]
+    """
+    return build_prompt("questions", programming_languages=programming_languages, job_level=job_level, count=count)
+
+
+class QuestionBank:
+    """
+    SQLite-backed stock of interview questions indexed by technologies and job level.
+
+    :param path: Path of the SQLite database file.
+    :type path: str
+    :param low_water: Number of unseen questions below which a refill is scheduled.
+    :type low_water: int
+    :param refill: Number of questions generated per refill.
+    :type refill: int
+    :param max_questions: Maximum number of questions stored per technologies and level.
+    :type max_questions: int
+    :param model: Name of the chat model generating the questions.
+    :type model: str
+    """
+
+    def __init__(self, path=QUESTION_BANK_PATH, low_water=QUESTION_BANK_LOW_WATER, refill=QUESTION_BANK_REFILL,
+                 max_questions=QUESTION_BANK_MAX, model=DEFAULT_MODEL):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.low_water = low_water
+        self.refill = refill
+        self.max_questions = max_questions
+        self.model = model
+        self._lock = threading.Lock()
+        self._refilling = set()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="question-bank")
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(
+            "CREATE TABLE IF NOT EXISTS questions ("
+            "id INTEGER PRIMARY KEY, technologies TEXT NOT NULL, job_level TEXT NOT NULL, "
+            "question TEXT NOT NULL, created REAL NOT NULL, UNIQUE (technologies, job_level, question));"
+            "CREATE INDEX IF NOT EXISTS questions_options ON questions (technologies, job_level);"
+            "CREATE TABLE IF NOT EXISTS seen ("
+            "session_id TEXT NOT NULL, question_id INTEGER NOT NULL, PRIMARY KEY (session_id, question_id));"
+        )
+        self._connection.commit()
+
+    def _counts(self, technologies, job_level, session_id):
+        """
+        Count all stored questions and those not yet seen by a session.
+
+        Must be called with the lock held.
+        """
+        total, unseen = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(id NOT IN (SELECT question_id FROM seen WHERE session_id = ?)), 0) "
+            "FROM questions WHERE technologies = ? AND job_level = ?",
+            (session_id, technologies, job_level),
+        ).fetchone()
+        return total, unseen
+
+    def ensure_stock(self, technologies, job_level, session_id):
+        """
+        Schedule a background refill if the session is running out of unseen questions.
+
+        :param technologies: Selected technologies, as passed to the prompts.
+        :type technologies: str
+        :param job_level: Selected job level.
+        :type job_level: str
+        :param session_id: Identifier of the interview session.
+        :type session_id: str
+        """
+        key = (technologies, job_level)
+        with self._lock:
+            total, unseen = self._counts(technologies, job_level, session_id)
+            if unseen >= self.low_water or total >= self.max_questions or key in self._refilling:
+                return
+            self._refilling.add(key)
+        self._executor.submit(self._refill, technologies, job_level)
+
+    def _refill(self, technologies, job_level):
+        """
+        Generate a batch of questions and add the new ones to the bank.
+
+        Refills run in the background, so they are sent as batch requests.
+        """
+        try:
+            structured_llm = get_llm(self.model).with_structured_output(QuestionList)
+            with batch_priority():
+                result = structured_llm.invoke(questions_prompt(technologies, job_level, self.refill))
+            now = time.time()
+            with self._lock:
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO questions (technologies, job_level, question, created) VALUES (?, ?, ?, ?)",
+                    [(technologies, job_level, question.strip(), now) for question in result.questions if question.strip()],
+                )
+                self._connection.commit()
+        except Exception as e:
+            print(f"Question bank refill failed: {e}")
+        finally:
+            with self._lock:
+                self._refilling.discard((technologies, job_level))
+
+    def take(self, technologies, job_level, session_id):
+        """
+        Return a random question the session has not seen yet and mark it as seen.
+
+        A refill is scheduled when the unseen stock falls below the low-water mark.
+
+        :param technologies: Selected technologies, as passed to the prompts.
+        :type technologies: str
+        :param job_level: Selected job level.
+        :type job_level: str
+        :param session_id: Identifier of the interview session.
+        :type session_id: str
+        :return: Question text, or None if the bank has no unseen question.
+        :rtype: str or None
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT id, question FROM questions WHERE technologies = ? AND job_level = ? "
+                "AND id NOT IN (SELECT question_id FROM seen WHERE session_id = ?) ORDER BY RANDOM() LIMIT 1",
+                (technologies, job_level, session_id),
+            ).fetchone()
+            if row is not None:
+                self._connection.execute("INSERT OR IGNORE INTO seen VALUES (?, ?)", (session_id, row[0]))
+                self._connection.commit()
+        self.ensure_stock(technologies, job_level, session_id)
+        return row[1] if row is not None else None
+
+
+@st.cache_resource(show_spinner=False)
+def get_question_bank():
+    """
+    Return the process-wide question bank.
+
+    :return: Shared question bank.
+    :rtype: QuestionBank
+    """
+    return QuestionBank()
@@ -0,0 +1,122 @@
+"""
+Local index of the interview questions asked in a session.
+
+Questions are compared by MinHash signatures of their word shingles, computed and
+searched with NumPy, so a near-duplicate of an already asked question (the same
+question reworded or with a few words changed) is recognized with a local lookup
+instead of by sending the question history to the model.
+"""
+import os
+import re
+import zlib
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+# Estimated Jaccard similarity of the shingles above which a question is a near-duplicate
+QUESTION_DUPLICATE_THRESHOLD = float(os.getenv("QUESTION_DUPLICATE_THRESHOLD", "0.5"))
+# Number of hash functions of a signature
+SIGNATURE_SIZE = 128
+SHINGLE_WORDS = 2
+# Words that do not tell questions apart
+STOP_WORDS = frozenset(
+    "a an and are as at be can could do does for from how i in is it its of on or should the this to "
+    "what when where which why will with would you your".split()
+)
+
+_PRIME = np.uint64(2 ** 31 - 1)
+_rng = np.random.default_rng(0)
+# Fixed hash functions, so signatures of different indexes are comparable
+_A = _rng.integers(1, 2 ** 31 - 1, SIGNATURE_SIZE, dtype=np.uint64)
+_B = _rng.integers(0, 2 ** 31 - 1, SIGNATURE_SIZE, dtype=np.uint64)
+
+
+def shingles(text):
+    """
+    Split a text into its normalized word shingles.
+
+    Stop words and one-letter words are dropped and simple plurals folded.
+
+    :param text: Text of a question.
+    :type text: str
+    :return: Distinct words and sequences of :data:`SHINGLE_WORDS` consecutive words.
+    :rtype: set[str]
+    """
+    words = [
+        # Fold simple plurals, so "lists" and "list" are the same word
+        word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+        for word in re.findall(r"\w+", text.lower())
+        if word not in STOP_WORDS and len(word) > 1
+    ]
+    # Single words catch reordered rewordings, word pairs tell apart questions on one topic
+    return set(words) | {
+        " ".join(words[index:index + SHINGLE_WORDS]) for index in range(len(words) - SHINGLE_WORDS + 1)
+    }
+
+
+def signature(text):
+    """
+    Compute the MinHash signature of a text.
+
+    :param text: Text of a question.
+    :type text: str
+    :return: Minimum of every hash function over the shingles; the largest value for a
+        text without words.
+    :rtype: numpy.ndarray
+    """
+    hashes = np.array([zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(text)], dtype=np.uint64)
+    if hashes.size == 0:
+        return np.full(SIGNATURE_SIZE, np.iinfo(np.uint64).max, dtype=np.uint64)
+    # (a * x + b) mod p stays below 2**63 for 31-bit a, b and x
+    return ((np.outer(hashes % _PRIME, _A) + _B) % _PRIME).min(axis=0)
+
+
+class QuestionIndex:
+    """
+    MinHash index of the questions asked in one session.
+
+    :param threshold: Similarity above which a question is a near-duplicate.
+    :type threshold: float
+    """
+
+    def __init__(self, threshold=QUESTION_DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._signatures = np.empty((0, SIGNATURE_SIZE), dtype=np.uint64)
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def add(self, question):
+        """
+        Add an asked question to the index.
+
+        :param question: Question text.
+        :type question: str
+        """
+        self._signatures = np.vstack([self._signatures, signature(question)])
+
+    def similarity(self, question):
+        """
+        Estimate the highest similarity of a question to the asked ones.
+
+        :param question: Question text.
+        :type question: str
+        :return: Estimated Jaccard similarity of the shingles in the range 0-1, 0 for an
+            empty index.
+        :rtype: float
+        """
+        if not len(self):
+            return 0.0
+        return float((self._signatures == signature(question)).mean(axis=1).max())
+
+    def is_duplicate(self, question):
+        """
+        Check whether a question is a near-duplicate of an asked one.
+
+        :param question: Question text.
+        :type question: str
+        :return: True if the question should not be asked again.
+        :rtype: bool
+        """
+        return self.similarity(question) >= self.threshold
@@ -0,0 +1,177 @@
+"""
+Headless CV screening pipeline.
+
+Runs the CV analysis workflow from :mod:`services.cv_workflow` without a browser
+session: all .docx files from a directory are parsed in a process pool, analyzed
+against one job requirements document and written to a JSONL file, one line per CV.
+
+Example::
+
+    python -m services.screening cvs/ --requirements job.docx --output results.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from services.cv_workflow import analyze_document, build_graph, requirements_analysis_prompt
+from services.docx_text import read_docx
+from services.llm_client import DEFAULT_MODEL
+from services.metrics import get_metrics
+from services.metrics_callback import get_metrics_callback
+from services.skills import coverage_percent, extract_skills
+
+
+def parse_documents(paths, workers=None):
+    """
+    Extract the text of many .docx files in a process pool.
+
+    :param paths: Paths of the .docx files.
+    :type paths: list[str]
+    :param workers: Number of worker processes; defaults to the number of CPUs.
+    :type workers: int or None
+    :return: Pairs of file name and either the text or the parsing exception.
+    :rtype: list[tuple[str, str or Exception]]
+    """
+    documents = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [(path, executor.submit(read_docx, path)) for path in paths]
+        for path, future in futures:
+            try:
+                documents.append((os.path.basename(path), future.result()))
+            except Exception as e:
+                documents.append((os.path.basename(path), e))
+    return documents
+
+
+def result_record(name, output, skill_coverage=None):
+    """
+    Convert the final graph state of one CV into a JSON-serializable record.
+
+    :param name: Name of the CV file.
+    :type name: str
+    :param output: Final graph state, or the exception raised by the workflow.
+    :type output: dict or Exception
+    :param skill_coverage: Percentage of the required skills matched locally in the CV,
+        kept in the record even when the workflow failed.
+    :type skill_coverage: float or None
+    :return: Result record.
+    :rtype: dict
+    """
+    if isinstance(output, Exception):
+        return {"file": name, "skill_coverage": skill_coverage, "error": str(output)}
+    return {
+        "file": name,
+        "match": output["match"],
+        "skill_coverage": skill_coverage,
+        "cv_scores": output["cv_scores"],
+        "requirements_scores": output["requirements_scores"],
+        "cv_analysis": output["cv_analysis"],
+        "model_cv": output.get("model_cv"),
+    }
+
+
+async def _screen(graph, states, names, concurrency, output, required_skills):
+    """
+    Run the workflow on all CV states and write each result as soon as it is finished.
+    """
+    config = {"max_concurrency": concurrency, "callbacks": [get_metrics_callback()]}
+    async for index, result in graph.abatch_as_completed(states, config=config, return_exceptions=True):
+        skills = coverage_percent(extract_skills(states[index]["cv_text"]), required_skills)
+        output.write(json.dumps(result_record(names[index], result, skills)) + "\n")
+        output.flush()
+
+
+def screen_directory(directory, requirements_path, output_path, concurrency=8, workers=None,
+                     model=DEFAULT_MODEL, generate_model_cv=True):
+    """
+    Analyze every .docx file in a directory and write the results as JSONL.
+
+    The requirements are analyzed once and reused by every CV. Results are written in
+    completion order as soon as each CV is finished.
+
+    :param directory: Directory with the CV .docx files.
+    :type directory: str
+    :param requirements_path: Path of the job requirements .docx file.
+    :type requirements_path: str
+    :param output_path: Path of the JSONL output file.
+    :type output_path: str
+    :param concurrency: Maximum number of CVs analyzed at once.
+    :type concurrency: int
+    :param workers: Number of processes parsing the documents.
+    :type workers: int or None
+    :param model: Name of the large chat model; the analyses use the routed models.
+    :type model: str
+    :param generate_model_cv: Whether to generate a model CV for every candidate.
+    :type generate_model_cv: bool
+    :return: Number of processed CVs and the elapsed time in seconds.
+    :rtype: tuple[int, float]
+    """
+    start = time.perf_counter()
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(".docx") and not name.startswith("~$")
+    )
+    requirements_text = read_docx(requirements_path)
+    requirements = asyncio.run(analyze_document(
+        "analise_requirements_node", requirements_text, requirements_analysis_prompt, "job requirements document",
+        model,
+    ))
+
+    names = []
+    states = []
+    with open(output_path, "w", encoding="utf-8") as output:
+        for name, text in parse_documents(paths, workers):
+            if isinstance(text, Exception):
+                output.write(json.dumps(result_record(name, text)) + "\n")
+                continue
+            names.append(name)
+            states.append({
+                "cv_text": text,
+                "cv_name": name,
+                # Screened CVs are distinct documents, so sectioning would only add requests
+                "analyze_sections": False,
+                "requirements_text": requirements_text,
+                "requirements_name": os.path.basename(requirements_path),
+                "requirements_analysis": requirements.summary,
+                "requirements_scores": requirements.scores(),
+                "generate_model_cv": generate_model_cv,
+            })
+
+        asyncio.run(_screen(build_graph(model), states, names, concurrency, output, extract_skills(requirements_text)))
+    return len(paths), time.perf_counter() - start
+
+
+def main(argv=None):
+    """
+    Command-line entry point of the screening pipeline.
+
+    :param argv: Command-line arguments; defaults to :data:`sys.argv`.
+    :type argv: list[str] or None
+    """
+    parser = argparse.ArgumentParser(description="Screen a directory of CVs against job requirements.")
+    parser.add_argument("directory", help="directory with the CV .docx files")
+    parser.add_argument("--requirements", required=True, help="job requirements .docx file")
+    parser.add_argument("--output", default="results.jsonl", help="JSONL output file")
+    parser.add_argument("--concurrency", type=int, default=8, help="CVs analyzed at once")
+    parser.add_argument("--workers", type=int, default=None, help="processes parsing the documents")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="chat model name")
+    parser.add_argument("--skip-model-cv", action="store_true", help="do not generate model CVs")
+    args = parser.parse_args(argv)
+
+    count, elapsed = screen_directory(
+        args.directory, args.requirements, args.output, concurrency=args.concurrency,
+        workers=args.workers, model=args.model, generate_model_cv=not args.skip_model_cv,
+    )
+    print(
+        f"Screened {count} CVs in {elapsed:.1f} s ({60 * count / elapsed:.1f} CVs per minute)",
+        file=sys.stderr,
+    )
+    get_metrics().flush()
+
+
+if __name__ == "__main__":
+    main()
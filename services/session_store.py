@@ -0,0 +1,147 @@
+"""
+Durable storage of Technical Review sessions.
+
+The transcript of every interview session is written to a local SQLite database as
+messages are added, so the Streamlit session only has to keep a recent window in
+memory. Older messages are read back page by page on demand and a session can be
+resumed by its id after a restart. The workflow graph state of each session (such as
+the weak-areas summary) is persisted by a LangGraph checkpointer in the same database;
+the checkpointer is asynchronous and bound to the background event loop of
+:mod:`services.async_runner`, where the workflows run.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import aiosqlite
+import streamlit as st
+from dotenv import load_dotenv
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from services.async_runner import run_sync
+
+load_dotenv()
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", os.path.join(".cache", "sessions.sqlite"))
+
+
+def _connect(path):
+    """
+    Open a connection shared between threads, creating the database directory if needed.
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    return connection
+
+
+async def _checkpointer(path):
+    """
+    Open the asynchronous checkpointer on the running event loop.
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    connection = await aiosqlite.connect(path)
+    # An open cursor would keep the database locked for the transcript store
+    async with connection.execute("PRAGMA journal_mode=WAL"):
+        pass
+    return AsyncSqliteSaver(connection)
+
+
+class SessionStore:
+    """
+    SQLite store of session transcripts.
+
+    :param path: Path of the SQLite database file.
+    :type path: str
+    """
+
+    def __init__(self, path=SESSION_DB_PATH):
+        self._lock = threading.Lock()
+        self._connection = _connect(path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL, "
+            "created REAL NOT NULL, PRIMARY KEY (session_id, seq))"
+        )
+        self._connection.commit()
+
+    def append(self, session_id, seq, role, content):
+        """
+        Store a message of a session.
+
+        :param session_id: Identifier of the session.
+        :type session_id: str
+        :param seq: Position of the message in the transcript, starting at 0.
+        :type seq: int
+        :param role: Role of the sender (e.g., 'user', 'assistant').
+        :type role: str
+        :param content: Message content.
+        :type content: str
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?)",
+                (session_id, seq, role, str(content), time.time()),
+            )
+            self._connection.commit()
+
+    def count(self, session_id):
+        """
+        Return the number of stored messages of a session.
+
+        :param session_id: Identifier of the session.
+        :type session_id: str
+        :return: Number of messages.
+        :rtype: int
+        """
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+
+    def load(self, session_id, start, stop):
+        """
+        Read a slice of the transcript of a session.
+
+        :param session_id: Identifier of the session.
+        :type session_id: str
+        :param start: Position of the first message.
+        :type start: int
+        :param stop: Position after the last message.
+        :type stop: int
+        :return: Messages ordered by position.
+        :rtype: list[dict]
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (session_id, start, stop),
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+
+@st.cache_resource(show_spinner=False)
+def get_session_store():
+    """
+    Return the process-wide session store.
+
+    :return: Shared session store.
+    :rtype: SessionStore
+    """
+    return SessionStore()
+
+
+@st.cache_resource(show_spinner=False)
+def get_checkpointer():
+    """
+    Return the process-wide LangGraph checkpointer persisting workflow state per session.
+
+    The checkpointer is created on the background event loop and can only be used by
+    graphs running there.
+
+    :return: Shared asynchronous SQLite checkpointer.
+    :rtype: AsyncSqliteSaver
+    """
+    return run_sync(_checkpointer(SESSION_DB_PATH))
@@ -0,0 +1,290 @@
+"""
+Local extraction of technical skills from CVs and job requirements.
+
+Skills are found by a taxonomy of technologies grouped like the technologies of the
+Technical Review, each listed with its aliases. All aliases are compiled at import into
+one multi-pattern regular expression, so a document is scanned in a single pass
+without calling the language model. The resulting skill coverage of a CV
+against job requirements is available instantly: it is shown before the model analysis
+finishes and remains when the model is slow or unavailable.
+"""
+import re
+
+import pandas as pd
+
+# Skills by technology and their aliases. Aliases written in lower case are matched in
+# any case; aliases with an upper-case letter are matched exactly, so "go" or "react" in
+# lower case are not skills. Capitalized words can still start a sentence or a name,
+# so the ambiguous ones are listed in LISTED_ALIASES as well.
+SKILL_TAXONOMY = {
+    "AI/ML": {
+        "Machine Learning": ("machine learning", "ML"),
+        "Deep Learning": ("deep learning", "neural networks"),
+        "NLP": ("nlp", "natural language processing"),
+        "LLM": ("llm", "llms", "large language models", "large language model"),
+        "Computer Vision": ("computer vision", "opencv"),
+        "TensorFlow": ("tensorflow", "keras"),
+        "PyTorch": ("pytorch",),
+        "scikit-learn": ("scikit-learn", "sklearn"),
+    },
+    "JS": {
+        "JavaScript": ("javascript", "ecmascript", "JS", "ES6"),
+        "TypeScript": ("typescript",),
+        "React": ("React", "react.js", "reactjs"),
+        "Angular": ("Angular", "angularjs"),
+        "Vue.js": ("vue", "vue.js", "vuejs"),
+        "Node.js": ("node.js", "nodejs", "Node"),
+        "Express": ("express.js", "expressjs"),
+    },
+    "HTML": {
+        "HTML": ("html", "html5"),
+        "CSS": ("css", "css3"),
+        "Sass": ("sass", "scss"),
+        "Tailwind CSS": ("tailwind", "tailwindcss"),
+        "Bootstrap": ("Bootstrap",),
+    },
+    "PHP": {
+        "PHP": ("php",),
+        "Laravel": ("laravel",),
+        "Symfony": ("symfony",),
+        "WordPress": ("wordpress",),
+    },
+    "Ruby": {
+        "Ruby": ("ruby",),
+        "Ruby on Rails": ("ruby on rails", "rails", "RoR"),
+    },
+    "Python": {
+        "Python": ("python", "python3"),
+        "Django": ("django",),
+        "Flask": ("flask",),
+        "FastAPI": ("fastapi",),
+        "pandas": ("pandas",),
+        "NumPy": ("numpy",),
+    },
+    "Java": {
+        "Java": ("java", "Java EE", "j2ee"),
+        "Spring": ("Spring", "spring boot", "springboot"),
+        "Hibernate": ("hibernate",),
+        "Kotlin": ("kotlin",),
+        "Maven": ("maven",),
+        "Gradle": ("gradle",),
+    },
+    ".NET": {
+        ".NET": (".net", "dotnet", ".net core"),
+        "C#": ("c#", "csharp"),
+        "ASP.NET": ("asp.net", "asp.net core", "asp.net mvc"),
+        "Entity Framework": ("entity framework",),
+    },
+    "Scala": {
+        "Scala": ("scala",),
+        "Akka": ("akka",),
+        "Play Framework": ("play framework",),
+    },
+    "C": {
+        "C": ("C",),
+        "C++": ("c++", "cpp"),
+        "Rust": ("Rust",),
+        "Embedded": ("embedded systems", "embedded", "microcontrollers", "rtos"),
+    },
+    "Mobile": {
+        "Android": ("android",),
+        "iOS": ("ios",),
+        "Swift": ("Swift", "swiftui"),
+        "Flutter": ("flutter", "dart"),
+        "React Native": ("react native",),
+    },
+    "Testing": {
+        "Test Automation": ("test automation", "automated testing", "automated tests"),
+        "Unit Testing": ("unit testing", "unit tests", "tdd"),
+        "QA": ("QA", "quality assurance"),
+        "Selenium": ("selenium",),
+        "Cypress": ("cypress",),
+        "pytest": ("pytest",),
+        "JUnit": ("junit",),
+        "Jest": ("jest",),
+    },
+    "DevOps": {
+        "Docker": ("docker",),
+        "Kubernetes": ("kubernetes", "k8s"),
+        "CI/CD": ("ci/cd", "continuous integration", "continuous delivery", "continuous deployment"),
+        "Jenkins": ("jenkins",),
+        "Terraform": ("terraform",),
+        "Ansible": ("ansible",),
+        "AWS": ("aws", "amazon web services"),
+        "Azure": ("azure",),
+        "GCP": ("gcp", "google cloud"),
+        "Git": ("git", "github", "gitlab"),
+    },
+    "Admin": {
+        "Linux": ("linux", "ubuntu", "debian", "centos", "red hat"),
+        "Windows Server": ("windows server",),
+        "Bash": ("bash", "shell scripting"),
+        "Networking": ("networking", "tcp/ip", "dns"),
+        "Active Directory": ("active directory",),
+    },
+    "UX/UI": {
+        "UX Design": ("ux", "user experience"),
+        "UI Design": ("UI", "ui design", "user interface"),
+        "Figma": ("figma",),
+        "Adobe XD": ("adobe xd",),
+        "Prototyping": ("prototyping", "wireframing", "wireframes"),
+    },
+    "PM": {
+        "Project Management": ("project management", "project manager", "PMP"),
+        "Agile": ("agile",),
+        "Scrum": ("scrum",),
+        "Kanban": ("kanban",),
+        "Jira": ("jira",),
+        "Stakeholder Management": ("stakeholder management",),
+    },
+    "Game": {
+        "Unity": ("Unity", "unity3d"),
+        "Unreal Engine": ("unreal engine", "unreal"),
+        "Godot": ("godot",),
+        "Game Design": ("game design", "game development"),
+    },
+    "Analytics": {
+        "Power BI": ("power bi", "powerbi"),
+        "Tableau": ("tableau",),
+        "Excel": ("Excel",),
+        "Google Analytics": ("google analytics",),
+        "Statistics": ("statistics", "statistical analysis"),
+    },
+    "Security": {
+        "Penetration Testing": ("penetration testing", "pentesting", "pentest"),
+        "OWASP": ("owasp",),
+        "SIEM": ("siem",),
+        "Cryptography": ("cryptography", "encryption"),
+        "IAM": ("iam", "identity and access management"),
+    },
+    "Data": {
+        "SQL": ("sql", "t-sql", "pl/sql"),
+        "PostgreSQL": ("postgresql", "postgres"),
+        "MySQL": ("mysql",),
+        "MongoDB": ("mongodb", "mongo"),
+        "Apache Spark": ("apache spark", "pyspark", "spark"),
+        "Hadoop": ("hadoop",),
+        "Kafka": ("kafka",),
+        "Airflow": ("airflow",),
+        "ETL": ("etl",),
+    },
+    "Go": {
+        "Go": ("Go", "golang"),
+    },
+    "Support": {
+        "Technical Support": ("technical support", "tech support", "help desk", "helpdesk", "service desk"),
+        "Customer Service": ("customer service", "customer support"),
+        "Troubleshooting": ("troubleshooting",),
+        "ITIL": ("itil",),
+    },
+    "ERP": {
+        "ERP": ("erp",),
+        "SAP": ("SAP", "sap s/4hana", "sap erp"),
+        "Microsoft Dynamics": ("microsoft dynamics", "dynamics 365"),
+        "Oracle ERP": ("oracle erp", "oracle e-business suite"),
+    },
+}
+# Aliases that are also ordinary words or letters ("React quickly", "Spring 2020", "grade C"),
+# counted only as an item of a list: next to a comma, slash, colon, "and"/"or", a bullet or
+# the end of a line
+LISTED_ALIASES = frozenset(
+    {"C", "Go", "React", "Angular", "Node", "Bootstrap", "Spring", "Rust", "Swift", "Unity", "Excel"}
+)
+# Technologies offered by the Technical Review, in the order they are listed
+TECHNOLOGIES = list(SKILL_TAXONOMY)
+# Technology of every skill; skill names are unique across technologies
+SKILL_GROUPS = {skill: group for group, skills in SKILL_TAXONOMY.items() for skill in skills}
+
+_ALIASES = [
+    (alias, skill) for skills in SKILL_TAXONOMY.values() for skill, aliases in skills.items() for alias in aliases
+]
+# Aliases matched in any case, and aliases matched exactly, with their skills
+_FOLDED = {alias: skill for alias, skill in _ALIASES if alias == alias.lower()}
+_EXACT = {alias: skill for alias, skill in _ALIASES if alias != alias.lower()}
+
+
+def _compile():
+    """
+    Compile all aliases into one pattern matching any of them as whole words.
+
+    Longer aliases are tried first, so "ruby on rails" wins over "ruby", and aliases are
+    not matched inside identifiers such as "node.js", "c++" or "Objective-C".
+    """
+    alternatives = "|".join(
+        re.escape(alias) if alias in _EXACT else f"(?i:{re.escape(alias)})"
+        for alias in sorted([*_FOLDED, *_EXACT], key=len, reverse=True)
+    )
+    return re.compile(rf"(?<![\w.-])(?:{alternatives})(?![\w+#]|\.\w)")
+
+
+# Compiled once for the whole process
+_PATTERN = _compile()
+_LIST_BEFORE = re.compile(r"(?:[,;:/(|&\u2022]|(?<!\S)[-*]|\b(?:and|or))[ \t]*$")
+_LIST_AFTER = re.compile(r"[ \t]*(?:[,;/)|&]|(?:and|or)\b|\r?\n|$)")
+
+
+def _listed(text, start, end):
+    """
+    Check whether the alias at ``text[start:end]`` is an item of a list.
+    """
+    return bool(_LIST_BEFORE.search(text, max(start - 8, 0), start) or _LIST_AFTER.match(text, end, end + 8))
+
+
+def extract_skills(text):
+    """
+    Find the skills of the taxonomy mentioned in a document.
+
+    :param text: Text content of the CV or requirements.
+    :type text: str
+    :return: Found skills with the number of their mentions, in taxonomy order.
+    :rtype: dict[str, int]
+    """
+    counts = {}
+    for match in _PATTERN.finditer(text):
+        alias = match.group()
+        if alias in LISTED_ALIASES and not _listed(text, match.start(), match.end()):
+            continue
+        skill = _EXACT.get(alias) or _FOLDED[alias.lower()]
+        counts[skill] = counts.get(skill, 0) + 1
+    return {skill: counts[skill] for skill in SKILL_GROUPS if skill in counts}
+
+
+def coverage_percent(cv_skills, required_skills):
+    """
+    Compute the share of the required skills found in a CV.
+
+    :param cv_skills: Skills found in the CV.
+    :type cv_skills: Iterable[str]
+    :param required_skills: Skills found in the job requirements.
+    :type required_skills: Iterable[str]
+    :return: Percentage of the required skills mentioned by the CV, or None when the
+        requirements mention no skill of the taxonomy.
+    :rtype: float or None
+    """
+    required = set(required_skills)
+    if not required:
+        return None
+    return round(100 * len(required & set(cv_skills)) / len(required), 1)
+
+
+def skill_coverage(cv_text, requirements_text):
+    """
+    Build the skill coverage matrix of a CV against job requirements.
+
+    :param cv_text: Text content of the CV.
+    :type cv_text: str
+    :param requirements_text: Text content of the job requirements.
+    :type requirements_text: str
+    :return: Skills mentioned by either document, required ones first, with their
+        technology and whether the requirements and the CV mention them.
+    :rtype: pandas.DataFrame
+    """
+    cv = extract_skills(cv_text)
+    required = extract_skills(requirements_text)
+    rows = [
+        {"Skill": skill, "Technology": group, "Required": skill in required, "In CV": skill in cv}
+        for skill, group in SKILL_GROUPS.items()
+        if skill in cv or skill in required
+    ]
+    df = pd.DataFrame(rows, columns=["Skill", "Technology", "Required", "In CV"]).set_index("Skill")
+    return df.sort_values("Required", ascending=False, kind="stable")
@@ -34,3 +34,4 @@ import os
 import sys
 sys.path.insert(0, os.path.abspath('..'))
 sys.path.insert(0, os.path.abspath('../pages'))  # Dodaj katalog 'pages'
+sys.path.insert(0, os.path.abspath('../services'))
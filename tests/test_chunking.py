@@ -0,0 +1,23 @@
+"""
+Tests of the document chunking of :mod:`services.chunking`.
+"""
+from services.chunking import split_chunks
+
+
+def test_short_document_is_one_chunk():
+    assert split_chunks("Python developer\nDjango", 10, 3000) == ["Python developer\nDjango"]
+
+
+def test_lines_are_kept_whole():
+    text = "\n".join(f"line {index} " + "word " * 20 for index in range(100))
+    chunks = split_chunks(text, 2500, 500)
+    assert len(chunks) > 1
+    assert "\n".join(chunks) == text
+    assert max(len(chunk) for chunk in chunks) <= len(text) * 500 / 2500
+
+
+def test_line_without_spaces_is_split():
+    chunks = split_chunks("x" * 50000, 12500, 3000)
+    assert len(chunks) == 5
+    assert max(len(chunk) for chunk in chunks) <= 12000
+    assert "".join(chunks) == "x" * 50000
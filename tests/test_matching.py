@@ -0,0 +1,60 @@
+"""
+Tests of the candidate and requirements matching of :mod:`services.matching`.
+"""
+import numpy as np
+import pytest
+
+from services.matching import CV, REQUIREMENTS, ProfileStore, match_matrix
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ProfileStore(str(tmp_path / "profiles.sqlite"))
+
+
+def test_match_matrix_caps_exceeded_requirements():
+    matches = match_matrix([[10, 2, 6], [5, 4, 6]], [[5, 4, 6]])
+    assert matches.shape == (2, 1)
+    # Exceeding the experience does not make up for the missing technical skills
+    assert matches[0, 0] == pytest.approx(100 * (1 + 0.5 + 1) / 3, abs=0.1)
+    assert matches[1, 0] == 100.0
+
+
+def test_match_matrix_weights():
+    assert match_matrix([[5, 10, 10]], [[10, 10, 10]], [2, 1, 1])[0, 0] == 75.0
+
+
+def test_empty_store(store):
+    for kind in (CV, REQUIREMENTS):
+        names, matrix = store.profiles(kind)
+        assert names == []
+        assert matrix.shape[0] == 0
+        assert store.rank([5, 5, 5], against=kind) == []
+
+
+def test_rank_candidates_against_requirements(store):
+    store.add(CV, "junior.docx", "Junior", [2, 3, 6])
+    store.add(CV, "senior.docx", "Senior", [9, 9, 7])
+    store.add(REQUIREMENTS, "job.docx", "Job", [6, 6, 6])
+    ranking = store.rank([6, 6, 6], against=CV)
+    assert [name for name, _, _ in ranking] == ["senior.docx", "junior.docx"]
+    assert ranking[0][1] == 100.0
+    assert ranking[0][2] == [9.0, 9.0, 7.0]
+    # Requirements with no candidates yet still have their profile
+    assert store.profiles(REQUIREMENTS)[0] == ["job.docx"]
+
+
+def test_rank_requirements_against_candidate(store):
+    store.add(REQUIREMENTS, "lead.docx", "Lead", [10, 10, 8])
+    store.add(REQUIREMENTS, "mid.docx", "Mid", [5, 5, 5])
+    ranking = store.rank([5, 6, 5], against=REQUIREMENTS, limit=1)
+    assert ranking == [("mid.docx", 100.0, [5.0, 5.0, 5.0])]
+
+
+def test_analyzed_again_replaces_profile(store):
+    store.add(CV, "cv.docx", "Same text", [1, 1, 1])
+    store.rank([1, 1, 1])
+    store.add(CV, "cv.docx", "Same text", [8, 8, 8])
+    names, matrix = store.profiles(CV)
+    assert names == ["cv.docx"]
+    np.testing.assert_array_equal(matrix, [[8, 8, 8]])
@@ -0,0 +1,60 @@
+"""
+Tests of the prompt layout of :mod:`services.prompts`.
+
+Every Technical Review turn must start with the same bytes for the provider-side prompt
+cache to serve them, so only the last message of a prompt may change between turns.
+"""
+import pytest
+
+from services.prompts import RECRUITER_SYSTEM, build_prompt
+
+SESSION = {"programming_languages": "Python, Go", "job_level": "Mid"}
+# Values of two different turns of one session
+TURNS = [
+    {
+        "conclusions": "",
+        "question": "What is a Python generator?",
+        "answer": "A function that yields values lazily.",
+        "rating": "7",
+        "weak_areas": "",
+        "token_budget": 300,
+    },
+    {
+        "conclusions": "- goroutine scheduling",
+        "question": "How are goroutines scheduled?",
+        "answer": "By the Go runtime on a pool of threads.",
+        "rating": "4",
+        "weak_areas": "- goroutine scheduling",
+        "token_budget": 300,
+    },
+]
+TURN_PROMPTS = ["question", "rating", "model_answer", "congratulation", "weak_areas"]
+
+
+def _prompt(name, turn):
+    messages = build_prompt(name, **SESSION, **turn)
+    return [(message.type, message.content.encode("utf-8")) for message in messages]
+
+
+@pytest.mark.parametrize("name", TURN_PROMPTS)
+def test_prefix_is_identical_across_turns(name):
+    first, second = (_prompt(name, turn) for turn in TURNS)
+    assert len(first) == len(second) > 1
+    assert first[:-1] == second[:-1]
+    assert first[-1] != second[-1]
+
+
+@pytest.mark.parametrize("name", TURN_PROMPTS)
+def test_prefix_is_shared_by_all_turn_prompts(name):
+    system, context = _prompt(name, TURNS[0])[:2]
+    assert system == ("system", RECRUITER_SYSTEM.encode("utf-8"))
+    assert context == _prompt("question", TURNS[1])[1]
+    assert b"Python, Go" in context[1] and b"Mid" in context[1]
+
+
+@pytest.mark.parametrize("name", TURN_PROMPTS)
+def test_turn_values_are_only_in_the_tail(name):
+    head = b"".join(content for _, content in _prompt(name, TURNS[1])[:-1])
+    for value in TURNS[1].values():
+        if isinstance(value, str) and value:
+            assert value.encode("utf-8") not in head
@@ -0,0 +1,38 @@
+"""
+Tests of the near-duplicate question index of :mod:`services.question_index`.
+"""
+from services.question_index import QuestionIndex
+
+QUESTION = "What is the difference between a list and a tuple in Python?"
+
+
+def test_empty_index():
+    index = QuestionIndex()
+    assert len(index) == 0
+    assert index.similarity(QUESTION) == 0.0
+    assert not index.is_duplicate(QUESTION)
+
+
+def test_repeated_question_is_duplicate():
+    index = QuestionIndex()
+    index.add(QUESTION)
+    assert index.similarity(QUESTION) == 1.0
+    assert index.is_duplicate("What's the difference between lists and tuples in Python?")
+
+
+def test_reordered_question_is_duplicate():
+    index = QuestionIndex()
+    index.add(QUESTION)
+    assert index.is_duplicate("What is the difference between a tuple and a list in Python?")
+
+
+def test_different_questions_are_not_duplicates():
+    index = QuestionIndex()
+    index.add(QUESTION)
+    index.add("What is a Python decorator?")
+    for question in (
+        "What is a Python generator?",
+        "What is the difference between a process and a thread in Python?",
+        "How would you design a REST API in Go?",
+    ):
+        assert not index.is_duplicate(question), question
@@ -0,0 +1,47 @@
+"""
+Tests of the local skill extraction of :mod:`services.skills`.
+"""
+import pytest
+
+from services.skills import coverage_percent, extract_skills, skill_coverage
+
+
+def test_aliases_are_folded_to_skills():
+    skills = extract_skills("Backend in python3 and Django, deployed with k8s; PostgreSQL, Node.js, C#, .NET Core.")
+    assert list(skills) == ["Node.js", "Python", "Django", ".NET", "C#", "Kubernetes", "PostgreSQL"]
+
+
+def test_longest_alias_wins():
+    assert extract_skills("Ruby on Rails, Spring Boot, React Native") == {
+        "Ruby on Rails": 1, "Spring": 1, "React Native": 1,
+    }
+
+
+@pytest.mark.parametrize("text", [
+    "React quickly to incidents.",
+    "Spring 2020 internship",
+    "Final exam grade C in maths.",
+    "Go to market strategy.",
+    "Excel at teamwork.",
+    "Objective-C",
+])
+def test_ordinary_words_are_not_skills(text):
+    assert extract_skills(text) == {}
+
+
+@pytest.mark.parametrize("text, skills", [
+    ("Skills: Python, C, Go", ["Python", "C", "Go"]),
+    ("React and Angular", ["React", "Angular"]),
+    ("- Go\n- Rust\n", ["Rust", "Go"]),
+    ("C/C++", ["C", "C++"]),
+])
+def test_ambiguous_aliases_in_lists(text, skills):
+    assert list(extract_skills(text)) == skills
+
+
+def test_skill_coverage():
+    coverage = skill_coverage("Python, Docker and Kubernetes", "Python, Kafka and Kubernetes required")
+    assert list(coverage.index) == ["Python", "Kubernetes", "Kafka", "Docker"]
+    assert coverage.loc["Kafka"].tolist() == ["Data", True, False]
+    assert coverage_percent(["Python", "Kubernetes", "Docker"], ["Python", "Kafka", "Kubernetes"]) == 66.7
+    assert coverage_percent(["Python"], []) is None